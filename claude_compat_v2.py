@@ -5,8 +5,10 @@ Claude Compatibility Module (SDK-Compatible Version)
 This module provides enhanced compatibility with Claude 3.7 Sonnet's thinking protocol,
 following the approach used in the official Python MCP SDK.
 """
+import re
 import json
 import asyncio
+import functools
 from typing import Dict, Any, Optional, Callable, Awaitable, List, Union
 
 from loguru import logger
@@ -22,6 +24,12 @@ CLAUDE_MODELS = [
     "claude-3.7-sonnet",
 ]
 
+# Single case-insensitive matcher for any of the names above
+_CLAUDE_MODEL_RE = re.compile(
+    "|".join(re.escape(name) for name in CLAUDE_MODELS),
+    re.IGNORECASE,
+)
+
 # Default thinking protocol parameters
 DEFAULT_THINKING = {
     "enabled": True,
@@ -30,6 +38,7 @@ DEFAULT_THINKING = {
 }
 
 
+@functools.lru_cache(maxsize=256)
 def is_claude_model(model_name: str) -> bool:
     """
     Check if a model is a Claude model.
@@ -40,8 +49,7 @@ def is_claude_model(model_name: str) -> bool:
     Returns:
         True if the model is a Claude model, False otherwise
     """
-    model_name = model_name.lower()
-    return any(claude_model in model_name for claude_model in CLAUDE_MODELS)
+    return _CLAUDE_MODEL_RE.search(model_name) is not None
 
 
 def format_thinking_protocol(
@@ -63,12 +71,33 @@ def format_thinking_protocol(
     Returns:
         The formatted prompt with thinking protocol
     """
-    # If thinking is None or disabled, or if the model is not Claude, return the original prompt
-    if thinking is None or thinking.get("enabled", True) is False or not is_claude_model(model_name):
+    if thinking is None:
         return prompt
     
-    # Get thinking parameters with defaults
-    template = thinking.get("template", DEFAULT_THINKING["template"])
+    return _format_thinking(
+        prompt,
+        model_name,
+        thinking.get("template", DEFAULT_THINKING["template"]),
+        thinking.get("enabled", True),
+    )
+
+
+def _format_thinking(prompt: str, model_name: str, template: str, enabled: bool) -> str:
+    """
+    Format a prompt with an already-unpacked thinking configuration.
+    
+    Args:
+        prompt: The original prompt to format
+        model_name: The name of the model (to check if it's Claude)
+        template: The thinking template to append
+        enabled: Whether the thinking protocol is enabled
+        
+    Returns:
+        The formatted prompt with thinking protocol
+    """
+    # If thinking is disabled, or if the model is not Claude, return the original prompt
+    if enabled is False or not is_claude_model(model_name):
+        return prompt
     
     # Check if the template is valid
     if "{{thinking}}" not in template:
@@ -276,11 +305,7 @@ class ClaudeThinkingProtocol:
         Returns:
             The formatted prompt
         """
-        return format_thinking_protocol(
-            prompt=prompt,
-            thinking=self.get_config(),
-            model_name=model_name,
-        )
+        return _format_thinking(prompt, model_name, self.template, self.enabled)
     
     def process_response(self, response: str) -> Dict[str, str]:
         """
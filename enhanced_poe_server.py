@@ -29,7 +29,9 @@ from warp_agent_tools import (
     create_file_from_response,
     open_file_in_editor,
     parse_and_execute_actions,
-    format_action_results
+    batch_execute_actions,
+    format_action_results,
+    DEFAULT_MAX_CONCURRENT_ACTIONS
 )
 
 from pydantic import BaseModel, Field
@@ -311,6 +313,51 @@ async def create_file_tool(
         }
 
 
+@mcp.tool()
+async def batch_execute_tool(
+    actions: List[Dict[str, Any]],
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT_ACTIONS,
+    stop_on_error: bool = False,
+    working_directory: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Execute several actions in one call.
+    
+    Each action is a dict with an "action" key (execute_command, create_file
+    or open_file) plus the arguments of the matching single-action tool.
+    Independent actions run concurrently, saving one round-trip per action.
+    
+    Args:
+        actions: The actions to execute
+        max_concurrent: Maximum number of actions running at once
+        stop_on_error: Skip actions that have not started yet once one fails
+        working_directory: Default directory for commands
+        
+    Returns:
+        Per-action results and a summary
+    """
+    try:
+        results = await batch_execute_actions(
+            actions=actions,
+            max_concurrent=max_concurrent,
+            stop_on_error=stop_on_error,
+            working_directory=working_directory or os.getcwd()
+        )
+        
+        return {
+            "results": [result.dict() for result in results],
+            "summary": format_action_results(results)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error executing batch: {str(e)}")
+        return {
+            "success": False,
+            "action": "batch_execute",
+            "error": str(e)
+        }
+
+
 @mcp.tool()
 def get_enhanced_server_info() -> Dict[str, Any]:
     """
@@ -330,6 +377,7 @@ def get_enhanced_server_info() -> Dict[str, Any]:
                 "file_creation",
                 "command_execution", 
                 "editor_integration",
+                "batch_execution",
                 "automatic_parsing"
             ],
             "warp_integration": True,
@@ -5,6 +5,7 @@ File Utilities Module
 This module provides utilities for file validation, reading, and temporary file creation.
 """
 import os
+import stat
 import tempfile
 import mimetypes
 from pathlib import Path
@@ -54,16 +55,20 @@ def validate_file(
     Raises:
         FileHandlingError: If the file is invalid
     """
-    # Check if the file exists
-    if not os.path.exists(file_path):
+    # A single stat covers existence, type and size
+    try:
+        file_stat = os.stat(file_path)
+    except (OSError, ValueError):
+        # Anything os.path.exists() would report as missing, e.g. a path
+        # through a regular file or one containing a NUL byte
         raise FileHandlingError(f"File not found: {file_path}")
     
     # Check if the file is a file (not a directory)
-    if not os.path.isfile(file_path):
+    if not stat.S_ISREG(file_stat.st_mode):
         raise FileHandlingError(f"Not a file: {file_path}")
     
     # Check file size
-    file_size_bytes = os.path.getsize(file_path)
+    file_size_bytes = file_stat.st_size
     file_size_mb = file_size_bytes / (1024 * 1024)
     
     if file_size_mb > max_size_mb:
@@ -1,9 +1,8 @@
 """
 Poe API client package for the Poe Proxy MCP server.
 """
+import importlib
 
-from .poe_api import PoeClient
-from .session import SessionManager
 from .file_utils import (
     validate_file,
     is_text_file,
@@ -18,6 +17,26 @@ from .claude_compat import (
     is_claude_model,
 )
 
+# PoeClient and SessionManager pull in fastapi_poe (and with it FastAPI), so
+# they are imported on first access; servers that only use the OpenAI-compatible
+# client or the rate limiter never pay for it
+_LAZY_ATTRIBUTES = {
+    "PoeClient": ".poe_api",
+    "SessionManager": ".session",
+}
+
+
+def __getattr__(name):
+    """Import lazily exported attributes on first access."""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     "PoeClient",
     "SessionManager",
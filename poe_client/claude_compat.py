@@ -4,6 +4,7 @@ Claude 3.7 Sonnet compatibility module for the Poe API client.
 This module provides functionality for ensuring compatibility with Claude 3.7 Sonnet,
 particularly for handling the thinking protocol.
 """
+import functools
 from typing import Dict, Any, Optional, List
 import json
 
@@ -97,6 +98,7 @@ def handle_claude_error(error: Exception) -> Dict[str, str]:
     }
 
 
+@functools.lru_cache(maxsize=256)
 def is_claude_model(model_name: str) -> bool:
     """
     Check if a model is a Claude model.
@@ -5,6 +5,7 @@ This module provides functionality for handling file attachments,
 including validation, processing, and MIME type detection.
 """
 import os
+import stat
 import mimetypes
 from typing import Dict, Optional, Tuple, BinaryIO
 import tempfile
@@ -26,16 +27,20 @@ def validate_file(file_path: str, max_size_mb: int = 10) -> Tuple[str, str]:
     Raises:
         FileHandlingError: If the file is invalid
     """
-    # Check if file exists
-    if not os.path.exists(file_path):
+    # A single stat covers existence, type and size
+    try:
+        file_stat = os.stat(file_path)
+    except (OSError, ValueError):
+        # Anything os.path.exists() would report as missing, e.g. a path
+        # through a regular file or one containing a NUL byte
         raise FileHandlingError(f"File not found: {file_path}")
     
     # Check if file is a regular file
-    if not os.path.isfile(file_path):
+    if not stat.S_ISREG(file_stat.st_mode):
         raise FileHandlingError(f"Not a regular file: {file_path}")
     
     # Check file size
-    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    file_size_mb = file_stat.st_size / (1024 * 1024)
     if file_size_mb > max_size_mb:
         raise FileHandlingError(
             f"File size ({file_size_mb:.2f} MB) exceeds maximum allowed size "
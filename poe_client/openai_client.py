@@ -9,10 +9,12 @@ import json
 import time
 import uuid
 import asyncio
+import functools
 from typing import Dict, List, Optional, Any, AsyncGenerator, Union
 from concurrent.futures import ThreadPoolExecutor
 import httpx
 import openai
+import orjson
 from openai import AsyncOpenAI, OpenAI
 from pydantic import BaseModel, Field
 from loguru import logger
@@ -28,6 +30,28 @@ from utils import (
 # Tool execution registry
 TOOL_REGISTRY: Dict[str, callable] = {}
 
+# Whether each registered tool is a coroutine function, recorded when it is
+# registered instead of inspecting it on every call
+_TOOL_IS_ASYNC: Dict[str, bool] = {}
+
+
+# OpenAI error type and status code for each internal exception type
+_OPENAI_ERROR_TYPES = {
+    AuthenticationError: ("authentication_error", 401),
+    PoeApiError: ("api_error", 500),
+    ValueError: ("invalid_request_error", 400),
+}
+
+
+def _dumps_tool_output(result: Any) -> str:
+    """Serialize a tool result to the JSON string sent back to the model."""
+    try:
+        return orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:
+        # orjson rejects values it cannot represent natively, such as
+        # integers wider than 64 bits; the stdlib encoder handles those
+        return json.dumps(result)
+
 
 class OpenAITool(BaseModel):
     """OpenAI-compatible tool definition."""
@@ -73,7 +97,8 @@ class PoeOpenAIClient:
         api_key: str,
         base_url: str = "https://api.poe.com/v1",
         async_mode: bool = True,
-        debug_mode: bool = False
+        debug_mode: bool = False,
+        http_client: Optional[Union[httpx.AsyncClient, httpx.Client]] = None,
     ):
         """
         Initialize the OpenAI-compatible POE client.
@@ -83,6 +108,9 @@ class PoeOpenAIClient:
             base_url: Base URL for POE API (default: https://api.poe.com/v1)
             async_mode: Whether to use async client
             debug_mode: Enable debug logging
+            http_client: Optional preconfigured httpx client to send requests
+                through (must be an AsyncClient when async_mode is set);
+                it is closed together with this client
         """
         if not api_key:
             raise AuthenticationError(
@@ -100,6 +128,7 @@ class PoeOpenAIClient:
                 base_url=base_url,
                 timeout=60.0,
                 max_retries=3,
+                http_client=http_client,
             )
         else:
             self.client = OpenAI(
@@ -107,11 +136,19 @@ class PoeOpenAIClient:
                 base_url=base_url,
                 timeout=60.0,
                 max_retries=3,
+                http_client=http_client,
             )
         
         self.async_mode = async_mode
         logger.info(f"POE OpenAI client initialized (async={async_mode})")
     
+    async def close(self):
+        """Close the underlying HTTP connection pool."""
+        if self.async_mode:
+            await self.client.close()
+        else:
+            self.client.close()
+    
     def register_tool(self, name: str, func: callable, description: str = "", parameters: Dict = None):
         """
         Register a tool for function calling.
@@ -123,6 +160,7 @@ class PoeOpenAIClient:
             parameters: JSON schema for parameters
         """
         TOOL_REGISTRY[name] = func
+        _TOOL_IS_ASYNC[name] = asyncio.iscoroutinefunction(func)
         logger.debug(f"Registered tool: {name}")
         
     def get_tool_definition(self, name: str, description: str, parameters: Dict) -> Dict:
@@ -158,28 +196,34 @@ class PoeOpenAIClient:
         """
         name = tool_call["function"]["name"]
         try:
-            args = json.loads(tool_call["function"]["arguments"])
+            args = orjson.loads(tool_call["function"]["arguments"])
             
-            if name not in TOOL_REGISTRY:
+            func = TOOL_REGISTRY.get(name)
+            if func is None:
                 raise ValueError(f"Unknown tool: {name}")
             
-            func = TOOL_REGISTRY[name]
+            is_async = _TOOL_IS_ASYNC.get(name)
+            if is_async is None:
+                # Added to TOOL_REGISTRY directly rather than via register_tool
+                is_async = asyncio.iscoroutinefunction(func)
             
-            # Handle async and sync functions
-            if asyncio.iscoroutinefunction(func):
+            # Handle async and sync functions; sync tools run in the default
+            # executor so parallel calls don't serialize on the event loop
+            if is_async:
                 result = await func(**args)
             else:
-                result = func(**args)
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, functools.partial(func, **args))
             
             return {
                 "tool_call_id": tool_call["id"],
-                "output": json.dumps(result) if not isinstance(result, str) else result
+                "output": _dumps_tool_output(result) if not isinstance(result, str) else result
             }
         except Exception as e:
             logger.error(f"Tool execution failed for {name}: {str(e)}")
             return {
                 "tool_call_id": tool_call["id"],
-                "output": json.dumps({"error": str(e)})
+                "output": _dumps_tool_output({"error": str(e)})
             }
     
     async def process_tool_calls(self, tool_calls: List[Dict]) -> List[Dict]:
@@ -269,18 +313,23 @@ class PoeOpenAIClient:
             if self.debug_mode:
                 logger.debug(f"Chat completion request: model={model}, stream={stream}, tools={bool(tools)}")
             
-            # Make the API call
+            # Make the API call. The sync SDK blocks (including time.sleep
+            # between its retries), so keep it off the event loop
             if self.async_mode:
                 response = await self.client.chat.completions.create(**params)
             else:
-                response = self.client.chat.completions.create(**params)
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(
+                    None, functools.partial(self.client.chat.completions.create, **params)
+                )
             
             # Handle streaming response
             if stream:
                 return self._handle_stream(response)
             
             # Handle tool calls if present and auto-execution is enabled
-            if auto_execute_tools and hasattr(response.choices[0].message, 'tool_calls') and response.choices[0].message.tool_calls:
+            response_tool_calls = getattr(response.choices[0].message, 'tool_calls', None)
+            if auto_execute_tools and response_tool_calls:
                 tool_calls = [
                     {
                         "id": tc.id,
@@ -289,19 +338,21 @@ class PoeOpenAIClient:
                             "arguments": tc.function.arguments
                         }
                     }
-                    for tc in response.choices[0].message.tool_calls
+                    for tc in response_tool_calls
                 ]
                 
                 # Execute tools
                 tool_results = await self.process_tool_calls(tool_calls)
                 
                 # Add tool results to messages
-                for result in tool_results:
-                    messages.append({
+                messages.extend(
+                    {
                         "role": "tool",
                         "tool_call_id": result["tool_call_id"],
                         "content": result["output"]
-                    })
+                    }
+                    for result in tool_results
+                )
                 
                 # Make another call to get final response
                 return await self.chat_completion(
@@ -359,38 +410,53 @@ class PoeOpenAIClient:
     
     def _response_to_dict(self, response) -> Dict:
         """Convert OpenAI response object to dictionary."""
+        if hasattr(response, 'usage'):
+            usage = response.usage
+            usage_dict = {
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "completion_tokens": usage.completion_tokens if usage else 0,
+                "total_tokens": usage.total_tokens if usage else 0,
+            }
+        else:
+            usage_dict = None
+        
         return {
             "id": response.id,
             "object": response.object,
             "created": response.created,
             "model": response.model,
-            "choices": [
+            "choices": [self._choice_to_dict(choice) for choice in response.choices],
+            "usage": usage_dict,
+        }
+    
+    @staticmethod
+    def _choice_to_dict(choice) -> Dict:
+        """Convert a single OpenAI response choice to a dictionary."""
+        message = choice.message
+        
+        if hasattr(message, 'tool_calls'):
+            tool_calls = [
                 {
-                    "index": choice.index,
-                    "message": {
-                        "role": choice.message.role,
-                        "content": choice.message.content,
-                        "tool_calls": [
-                            {
-                                "id": tc.id,
-                                "type": tc.type,
-                                "function": {
-                                    "name": tc.function.name,
-                                    "arguments": tc.function.arguments
-                                }
-                            }
-                            for tc in (choice.message.tool_calls or [])
-                        ] if hasattr(choice.message, 'tool_calls') else None
-                    },
-                    "finish_reason": choice.finish_reason
+                    "id": tc.id,
+                    "type": tc.type,
+                    "function": {
+                        "name": tc.function.name,
+                        "arguments": tc.function.arguments
+                    }
                 }
-                for choice in response.choices
-            ],
-            "usage": {
-                "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
-                "completion_tokens": response.usage.completion_tokens if response.usage else 0,
-                "total_tokens": response.usage.total_tokens if response.usage else 0,
-            } if hasattr(response, 'usage') else None
+                for tc in (message.tool_calls or [])
+            ]
+        else:
+            tool_calls = None
+        
+        return {
+            "index": choice.index,
+            "message": {
+                "role": message.role,
+                "content": message.content,
+                "tool_calls": tool_calls,
+            },
+            "finish_reason": choice.finish_reason
         }
     
     @staticmethod
@@ -404,13 +470,7 @@ class PoeOpenAIClient:
         Returns:
             OpenAI-compatible error response
         """
-        error_mapping = {
-            AuthenticationError: ("authentication_error", 401),
-            PoeApiError: ("api_error", 500),
-            ValueError: ("invalid_request_error", 400),
-        }
-        
-        error_type, status_code = error_mapping.get(
+        error_type, status_code = _OPENAI_ERROR_TYPES.get(
             type(error), 
             ("internal_error", 500)
         )
@@ -5,9 +5,11 @@ This module provides a clean interface for interacting with the Poe API,
 handling authentication, streaming responses, and error handling.
 """
 import os
+import codecs
 import asyncio
 import tempfile
 from typing import Dict, List, Optional, AsyncGenerator, Any, Union
+import httpx
 import fastapi_poe as fp
 
 from utils import (
@@ -26,12 +28,26 @@ from .claude_compat import (
 )
 
 
+# Chunks buffered between the Poe stream and the stream handler; a slow
+# handler blocks the reader once this many chunks are waiting
+STREAM_QUEUE_SIZE = 16
+
+# Bytes read from an attachment to decide whether it is UTF-8 text
+TEXT_SNIFF_BYTES = 4096
+
+
 class PoeClient:
     """
     Client for interacting with the Poe API.
     """
     
-    def __init__(self, api_key: str, debug_mode: bool = False, claude_compatible: bool = False):
+    def __init__(
+        self,
+        api_key: str,
+        debug_mode: bool = False,
+        claude_compatible: bool = False,
+        timeout: float = 600,
+    ):
         """
         Initialize the Poe API client.
         
@@ -39,6 +55,7 @@ class PoeClient:
             api_key (str): The Poe API key for authentication
             debug_mode (bool): Whether to enable debug logging
             claude_compatible (bool): Whether to enable Claude compatibility mode
+            timeout (float): Timeout for bot requests in seconds
         
         Raises:
             AuthenticationError: If the API key is invalid
@@ -52,11 +69,100 @@ class PoeClient:
         self.debug_mode = debug_mode
         self.claude_compatible = claude_compatible
         
+        # Shared HTTP/2 connection pool for every bot request; without it
+        # fastapi_poe opens a fresh client (and TLS handshake) per call.
+        self.session = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=100,
+                keepalive_expiry=60,
+            ),
+        )
+        
         if self.claude_compatible:
             logger.info("Claude compatibility mode enabled")
         
         logger.info("Poe API client initialized")
     
+    async def close(self) -> None:
+        """Close the shared HTTP connection pool."""
+        await self.session.aclose()
+    
+    async def _stream_bot_response(
+        self,
+        bot_name: str,
+        messages: List[fp.ProtocolMessage],
+        process_chunks: bool,
+        stream_handler: Optional[callable],
+        parts: List[str],
+    ) -> None:
+        """
+        Stream a bot response, appending each chunk to ``parts``.
+        
+        The Poe stream and the stream handler run as separate tasks joined by
+        a bounded queue, so a slow handler applies backpressure to the reader
+        instead of both sharing one loop. ``parts`` holds whatever was received
+        if the stream fails part-way.
+        
+        Args:
+            bot_name (str): The name of the Poe bot to query
+            messages (List[fp.ProtocolMessage]): The conversation to send
+            process_chunks (bool): Whether to apply Claude response processing
+            stream_handler (callable, optional): Function to handle streaming responses
+            parts (List[str]): List the received chunks are appended to
+        """
+        async def read_chunks(queue: Optional[asyncio.Queue]) -> None:
+            async for partial in fp.get_bot_response(
+                messages=messages,
+                bot_name=bot_name,
+                api_key=self.api_key,
+                session=self.session,
+            ):
+                chunk_text = partial.text
+                
+                # Process Claude response if needed
+                if process_chunks:
+                    chunk_text = process_claude_response(chunk_text)
+                
+                if queue is None:
+                    parts.append(chunk_text)
+                else:
+                    await queue.put(chunk_text)
+            
+            if queue is not None:
+                await queue.put(None)
+        
+        if not stream_handler:
+            await read_chunks(None)
+            return
+        
+        async def handle_chunks(queue: asyncio.Queue) -> None:
+            while (chunk_text := await queue.get()) is not None:
+                parts.append(chunk_text)
+                await stream_handler(chunk_text)
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        tasks = [
+            asyncio.ensure_future(read_chunks(queue)),
+            asyncio.ensure_future(handle_chunks(queue)),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            
+            # Keep chunks that were read but not yet handled as partial output
+            while not queue.empty():
+                chunk_text = queue.get_nowait()
+                if chunk_text is not None:
+                    parts.append(chunk_text)
+    
     async def query_model(
         self,
         bot_name: str,
@@ -82,12 +188,9 @@ class PoeClient:
             PoeApiError: If there's an error from the Poe API
         """
         try:
-            # Prepare messages
-            if messages is None:
-                messages = []
-            
-            # Add the new user message
-            messages.append(fp.ProtocolMessage(role="user", content=prompt))
+            # Build the request history in one allocation; the caller's list
+            # (usually the live session history) is left untouched
+            messages = [*(messages or ()), fp.ProtocolMessage(role="user", content=prompt)]
             
             if self.debug_mode:
                 logger.debug(f"Querying bot '{bot_name}' with prompt: {prompt}")
@@ -103,24 +206,15 @@ class PoeClient:
                 formatted_thinking = None
             
             # Collect the full response
-            full_response = ""
+            response_parts: List[str] = []
             try:
-                async for partial in fp.get_bot_response(
-                    messages=messages,
+                await self._stream_bot_response(
                     bot_name=bot_name,
-                    api_key=self.api_key,
-                ):
-                    chunk_text = partial.text
-                    
-                    # Process Claude response if needed
-                    if is_claude and self.claude_compatible:
-                        chunk_text = process_claude_response(chunk_text)
-                    
-                    full_response += chunk_text
-                    
-                    # Call the stream handler if provided
-                    if stream_handler:
-                        await stream_handler(chunk_text)
+                    messages=messages,
+                    process_chunks=is_claude and self.claude_compatible,
+                    stream_handler=stream_handler,
+                    parts=response_parts,
+                )
             
             except Exception as e:
                 # Handle Claude-specific errors
@@ -129,9 +223,9 @@ class PoeClient:
                     logger.warning(f"Claude error handled: {error_info['message']}")
                     
                     # If we have a partial response, return it with the error
-                    if full_response:
+                    if response_parts:
                         return {
-                            "text": full_response,
+                            "text": "".join(response_parts),
                             "bot": bot_name,
                             "error": error_info["error"],
                             "error_message": error_info["message"],
@@ -143,6 +237,8 @@ class PoeClient:
                 # Re-raise other errors
                 raise
             
+            full_response = "".join(response_parts)
+            
             # Process the full response for Claude if needed
             if is_claude and self.claude_compatible:
                 full_response = process_claude_response(full_response)
@@ -159,6 +255,45 @@ class PoeClient:
             logger.error(f"Error querying Poe model: {str(e)}")
             raise PoeApiError(f"Error querying Poe model: {str(e)}")
     
+    @staticmethod
+    def _build_file_prompt(prompt: str, file_path: str) -> str:
+        """
+        Combine a prompt with the contents of a file.
+        
+        Does blocking file I/O; call it from an executor.
+        
+        Args:
+            prompt (str): The prompt to send to the bot
+            file_path (str): Path to the file to include with the prompt
+            
+        Returns:
+            str: The prompt with the file content, or a placeholder for binary files
+            
+        Raises:
+            FileHandlingError: If the file does not exist
+        """
+        # If it's not a text file, just use the original prompt
+        binary_prompt = f"{prompt}\n\n[File attached: {os.path.basename(file_path)}]"
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        
+        try:
+            with open(file_path, "rb") as f:
+                # Sniff the head first so binaries are rejected without
+                # reading the whole file
+                head = f.read(TEXT_SNIFF_BYTES)
+                if b"\x00" in head:
+                    return binary_prompt
+                
+                try:
+                    file_text = decoder.decode(head)
+                    file_text += decoder.decode(f.read(), final=True)
+                except UnicodeDecodeError:
+                    return binary_prompt
+        except FileNotFoundError:
+            raise FileHandlingError(f"File not found: {file_path}")
+        
+        return f"{prompt}\n\nFile content:\n{file_text}"
+    
     async def query_model_with_file(
         self,
         bot_name: str,
@@ -187,29 +322,15 @@ class PoeClient:
             PoeApiError: If there's an error from the Poe API
         """
         try:
-            # Validate file exists
-            if not os.path.exists(file_path):
-                raise FileHandlingError(f"File not found: {file_path}")
-            
-            # Prepare messages
-            if messages is None:
-                messages = []
-            
-            # Read the file content
-            with open(file_path, "rb") as f:
-                file_content = f.read()
-            
-            # Try to decode as text, otherwise treat as binary
-            try:
-                file_text = file_content.decode("utf-8")
-                combined_prompt = f"{prompt}\n\nFile content:\n{file_text}"
-            except UnicodeDecodeError:
-                # If it's not a text file, just use the original prompt
-                combined_prompt = f"{prompt}\n\n[File attached: {os.path.basename(file_path)}]"
+            # Read and decode the file off the event loop
+            loop = asyncio.get_running_loop()
+            combined_prompt = await loop.run_in_executor(
+                None, self._build_file_prompt, prompt, file_path
+            )
             
             if self.debug_mode:
                 logger.debug(f"Querying bot '{bot_name}' with file: {file_path}")
-                logger.debug(f"Message history length: {len(messages)}")
+                logger.debug(f"Message history length: {len(messages or ())}")
             
             # Handle Claude compatibility if needed
             is_claude = is_claude_model(bot_name)
@@ -220,28 +341,20 @@ class PoeClient:
             else:
                 formatted_thinking = None
             
-            # Add the new user message with the file content
-            messages.append(fp.ProtocolMessage(role="user", content=combined_prompt))
+            # Add the new user message with the file content, leaving the
+            # caller's history untouched
+            messages = [*(messages or ()), fp.ProtocolMessage(role="user", content=combined_prompt)]
             
             # Collect the full response
-            full_response = ""
+            response_parts: List[str] = []
             try:
-                async for partial in fp.get_bot_response(
-                    messages=messages,
+                await self._stream_bot_response(
                     bot_name=bot_name,
-                    api_key=self.api_key,
-                ):
-                    chunk_text = partial.text
-                    
-                    # Process Claude response if needed
-                    if is_claude and self.claude_compatible:
-                        chunk_text = process_claude_response(chunk_text)
-                    
-                    full_response += chunk_text
-                    
-                    # Call the stream handler if provided
-                    if stream_handler:
-                        await stream_handler(chunk_text)
+                    messages=messages,
+                    process_chunks=is_claude and self.claude_compatible,
+                    stream_handler=stream_handler,
+                    parts=response_parts,
+                )
             
             except Exception as e:
                 # Handle Claude-specific errors
@@ -250,9 +363,9 @@ class PoeClient:
                     logger.warning(f"Claude error handled: {error_info['message']}")
                     
                     # If we have a partial response, return it with the error
-                    if full_response:
+                    if response_parts:
                         return {
-                            "text": full_response,
+                            "text": "".join(response_parts),
                             "bot": bot_name,
                             "error": error_info["error"],
                             "error_message": error_info["message"],
@@ -264,6 +377,8 @@ class PoeClient:
                 # Re-raise other errors
                 raise
             
+            full_response = "".join(response_parts)
+            
             # Process the full response for Claude if needed
             if is_claude and self.claude_compatible:
                 full_response = process_claude_response(full_response)
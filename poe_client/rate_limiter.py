@@ -152,34 +152,42 @@ class ExponentialBackoffRateLimiter:
             self.request_times.popleft()
     
     async def _wait_for_slot(self) -> None:
-        """Wait until a request slot is available."""
-        async with self.lock:
-            while True:
+        """
+        Wait until a request slot is available.
+        
+        The lock only guards the window bookkeeping and is released before
+        sleeping, so concurrent callers back off side by side instead of
+        queueing behind a single sleeper.
+        """
+        while True:
+            async with self.lock:
                 self._cleanup_window()
+                current_time = time.time()
                 
-                # Check if we're under retry-after restriction
-                if self.retry_after_until and time.time() < self.retry_after_until:
-                    wait_time = self.retry_after_until - time.time()
-                    logger.info(f"Waiting {wait_time:.2f}s for retry-after period")
-                    await asyncio.sleep(wait_time)
+                if self.retry_after_until and current_time >= self.retry_after_until:
                     self.retry_after_until = None
                 
-                # Check if we can make a request
-                if len(self.request_times) < self.rpm_limit:
-                    self.request_times.append(time.time())
+                if self.retry_after_until:
+                    # Still inside a retry-after period
+                    wait_time = self.retry_after_until - current_time
+                    logger.info(f"Waiting {wait_time:.2f}s for retry-after period")
+                elif len(self.request_times) < self.rpm_limit:
+                    # Claim a slot in the current window
+                    self.request_times.append(current_time)
                     return
-                
-                # Calculate wait time with exponential backoff
-                backoff_multiplier = min(2 ** self.error_counts['rate_limit'], 64)
-                backoff = min(self.base_wait * backoff_multiplier, self.max_backoff)
-                jitter = random.uniform(0, backoff * 0.5)
-                total_wait = backoff + jitter
-                
-                self.metrics['total_wait_time'] += total_wait
-                self.metrics['rate_limited'] += 1
-                
-                logger.debug(f"Rate limit reached, waiting {total_wait:.3f}s")
-                await asyncio.sleep(total_wait)
+                else:
+                    # Calculate wait time with exponential backoff
+                    backoff_multiplier = min(2 ** self.error_counts['rate_limit'], 64)
+                    backoff = min(self.base_wait * backoff_multiplier, self.max_backoff)
+                    jitter = random.uniform(0, backoff * 0.5)
+                    wait_time = backoff + jitter
+                    
+                    self.metrics['total_wait_time'] += wait_time
+                    self.metrics['rate_limited'] += 1
+                    
+                    logger.debug(f"Rate limit reached, waiting {wait_time:.3f}s")
+            
+            await asyncio.sleep(wait_time)
     
     async def execute(
         self,
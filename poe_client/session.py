@@ -6,27 +6,38 @@ including creating, retrieving, updating, and deleting sessions.
 """
 import time
 import uuid
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 import fastapi_poe as fp
 
 from utils import logger
 
+# OpenAI chat roles mapped to fastapi_poe roles, which call the assistant "bot"
+_PROTOCOL_ROLES = {"user": "user", "assistant": "bot"}
+
 
 class SessionManager:
     """
     Manager for Poe API conversation sessions.
     """
     
-    def __init__(self, expiry_minutes: int = 60):
+    def __init__(self, expiry_minutes: int = 60, max_sessions: int = 1000):
         """
         Initialize the session manager.
         
         Args:
             expiry_minutes (int): Session expiry time in minutes
+            max_sessions (int): Maximum number of sessions kept in memory;
+                the least recently used session is evicted beyond this
         """
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+        # Ordered by last access, least recently used first
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.expiry_minutes = expiry_minutes
-        logger.info(f"Session manager initialized with {expiry_minutes} minute expiry")
+        self.max_sessions = max_sessions
+        logger.info(
+            f"Session manager initialized with {expiry_minutes} minute expiry "
+            f"and a cap of {max_sessions} sessions"
+        )
     
     def create_session(self) -> str:
         """
@@ -35,13 +46,20 @@ class SessionManager:
         Returns:
             str: The session ID
         """
-        session_id = str(uuid.uuid4())
+        session_id = uuid.uuid4().hex
         self.sessions[session_id] = {
             "messages": [],
+            "openai_messages": [],
             "created_at": time.time(),
-            "last_accessed": time.time(),
+            "last_accessed": time.monotonic(),
         }
         logger.debug(f"Created new session: {session_id}")
+        
+        # Evict least recently used sessions beyond the cap
+        while len(self.sessions) > self.max_sessions:
+            evicted_id, _ = self.sessions.popitem(last=False)
+            logger.debug(f"Evicted least recently used session: {evicted_id}")
+        
         return session_id
     
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
@@ -58,8 +76,9 @@ class SessionManager:
             logger.debug(f"Session not found: {session_id}")
             return None
         
-        # Update last accessed time
-        self.sessions[session_id]["last_accessed"] = time.time()
+        # Update last accessed time and LRU position
+        self.sessions[session_id]["last_accessed"] = time.monotonic()
+        self.sessions.move_to_end(session_id)
         
         # Check if session has expired
         if self._is_session_expired(session_id):
@@ -69,29 +88,37 @@ class SessionManager:
         
         return self.sessions[session_id]
     
-    def get_or_create_session(self, session_id: Optional[str] = None) -> str:
+    def get_or_create_session(
+        self,
+        session_id: Optional[str] = None,
+        create_if_missing: bool = True,
+    ) -> Optional[str]:
         """
         Get an existing session or create a new one.
         
         Args:
             session_id (Optional[str]): The session ID to retrieve
+            create_if_missing (bool): Whether to create a session when no live
+                session matches; stateless callers pass False
             
         Returns:
-            str: The session ID (either the existing one or a new one)
+            Optional[str]: The session ID (either the existing one or a new one),
+                or None if no session exists and create_if_missing is False
         """
         if session_id and session_id in self.sessions:
             # Check if session has expired
             if self._is_session_expired(session_id):
                 logger.debug(f"Session expired: {session_id}")
                 self.delete_session(session_id)
-                return self.create_session()
+                return self.create_session() if create_if_missing else None
             
-            # Update last accessed time
-            self.sessions[session_id]["last_accessed"] = time.time()
+            # Update last accessed time and LRU position
+            self.sessions[session_id]["last_accessed"] = time.monotonic()
+            self.sessions.move_to_end(session_id)
             logger.debug(f"Retrieved existing session: {session_id}")
             return session_id
         
-        return self.create_session()
+        return self.create_session() if create_if_missing else None
     
     def update_session(
         self, 
@@ -115,16 +142,27 @@ class SessionManager:
             logger.debug(f"Cannot update non-existent session: {session_id}")
             return False
         
-        # Add the new messages
-        session["messages"].append(fp.ProtocolMessage(role="user", content=user_message))
-        session["messages"].append(fp.ProtocolMessage(role="assistant", content=bot_message))
+        # The OpenAI-format transcript is the source of truth; ProtocolMessage
+        # copies are only built on demand by get_messages
+        session["openai_messages"].append({"role": "user", "content": user_message})
+        session["openai_messages"].append({"role": "assistant", "content": bot_message})
         
         # Update last accessed time
-        session["last_accessed"] = time.time()
+        session["last_accessed"] = time.monotonic()
         
         logger.debug(f"Updated session {session_id} with new messages")
         return True
     
+    async def flush(self) -> None:
+        """
+        Persist any buffered session writes.
+        
+        Sessions live in memory and updates are applied in place, so there is
+        nothing to write here. Storage-backed managers should batch their
+        writes and drain them in this method, which servers await on shutdown.
+        """
+        return None
+    
     def delete_session(self, session_id: str) -> bool:
         """
         Delete a session.
@@ -158,28 +196,82 @@ class SessionManager:
             logger.debug(f"Cannot get messages for non-existent session: {session_id}")
             return []
         
-        return session["messages"]
+        # Convert only the turns added since the last call, so sessions that
+        # never use the legacy client don't hold a second copy of the transcript
+        messages = session["messages"]
+        openai_messages = session["openai_messages"]
+        if len(messages) < len(openai_messages):
+            messages.extend(
+                fp.ProtocolMessage(role=_PROTOCOL_ROLES[msg["role"]], content=msg["content"])
+                for msg in openai_messages[len(messages):]
+            )
+        
+        return messages
+    
+    def get_openai_messages(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        Get the messages for a session in OpenAI chat format.
+        
+        The returned list is the session's own transcript; callers should
+        copy it before adding messages of their own.
+        
+        Args:
+            session_id (str): The session ID
+            
+        Returns:
+            List[Dict[str, str]]: The messages as role/content dicts
+        """
+        session = self.get_session(session_id)
+        if not session:
+            logger.debug(f"Cannot get messages for non-existent session: {session_id}")
+            return []
+        
+        return session["openai_messages"]
     
     def cleanup_expired_sessions(self) -> int:
         """
         Clean up expired sessions.
         
+        Sessions are kept in last-access order, so expired sessions are always
+        at the front and the sweep stops at the first live one.
+        
         Returns:
             int: The number of sessions cleaned up
         """
-        expired_sessions = []
+        cutoff = time.monotonic() - self.expiry_minutes * 60
+        num_expired = 0
         
-        for session_id in self.sessions:
-            if self._is_session_expired(session_id):
-                expired_sessions.append(session_id)
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session["last_accessed"] >= cutoff:
+                break
+            
+            self.sessions.popitem(last=False)
+            logger.debug(f"Deleted session: {session_id}")
+            num_expired += 1
         
-        for session_id in expired_sessions:
-            self.delete_session(session_id)
+        if num_expired:
+            logger.info(f"Cleaned up {num_expired} expired sessions")
+        
+        return num_expired
+    
+    def seconds_until_next_expiry(self) -> float:
+        """
+        Get the time until the least recently used session expires.
+        
+        No session created or touched later can expire sooner, so callers can
+        sleep this long before the next sweep.
         
-        if expired_sessions:
-            logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
+        Returns:
+            float: Seconds until the next expiry, or the full expiry period
+                when there are no sessions
+        """
+        expiry_seconds = self.expiry_minutes * 60
+        if not self.sessions:
+            return expiry_seconds
         
-        return len(expired_sessions)
+        oldest = next(iter(self.sessions.values()))
+        return max(0.0, oldest["last_accessed"] + expiry_seconds - time.monotonic())
     
     def _is_session_expired(self, session_id: str) -> bool:
         """
@@ -197,4 +289,4 @@ class SessionManager:
         last_accessed = self.sessions[session_id]["last_accessed"]
         expiry_time = last_accessed + (self.expiry_minutes * 60)
         
-        return time.time() > expiry_time
\ No newline at end of file
+        return time.monotonic() > expiry_time
\ No newline at end of file
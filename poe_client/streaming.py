@@ -7,15 +7,20 @@ This module implements:
 - Chunk aggregation and buffering
 - Error recovery in streams
 """
-import json
 import asyncio
 import time
 from typing import AsyncGenerator, Dict, Any, Optional, List
 from dataclasses import dataclass, asdict
 from enum import Enum
+import orjson
 from loguru import logger
 
 
+# Encoded pieces shared by every SSE frame
+SSE_DATA_PREFIX = b"data: "
+SSE_FRAME_END = b"\n\n"
+
+
 class StreamEventType(Enum):
     """SSE event types."""
     MESSAGE = "message"
@@ -34,28 +39,26 @@ class StreamEvent:
     id: Optional[str] = None
     retry: Optional[int] = None
     
-    def to_sse(self) -> str:
-        """Convert to SSE format."""
-        lines = []
+    def to_sse(self) -> bytes:
+        """Convert to an encoded SSE frame."""
+        fields = []
         
         if self.id:
-            lines.append(f"id: {self.id}")
+            fields.append(f"id: {self.id}\n")
         
         if self.event != StreamEventType.MESSAGE:
-            lines.append(f"event: {self.event.value}")
+            fields.append(f"event: {self.event.value}\n")
         
         if self.retry is not None:
-            lines.append(f"retry: {self.retry}")
+            fields.append(f"retry: {self.retry}\n")
         
         # Format data as JSON
         if isinstance(self.data, str):
-            data_str = self.data
+            data = self.data.encode()
         else:
-            data_str = json.dumps(self.data)
-        
-        lines.append(f"data: {data_str}")
+            data = orjson.dumps(self.data, option=orjson.OPT_NON_STR_KEYS)
         
-        return "\n".join(lines) + "\n\n"
+        return "".join(fields).encode() + SSE_DATA_PREFIX + data + SSE_FRAME_END
 
 
 class ChunkAggregator:
@@ -146,17 +149,21 @@ class SSEStreamer:
     async def stream_response(
         self,
         response_generator: AsyncGenerator[Dict[str, Any], None],
-        include_aggregation: bool = True
-    ) -> AsyncGenerator[str, None]:
+        include_aggregation: bool = False
+    ) -> AsyncGenerator[bytes, None]:
         """
         Stream response as SSE.
         
+        The delta events are the source of truth for streamed content; the
+        optional completion event only summarises what was already sent.
+        
         Args:
             response_generator: Async generator of response chunks
-            include_aggregation: Whether to send aggregated content at end
+            include_aggregation: Whether to send a completion summary
+                (content length, tool calls, metadata) at the end
             
         Yields:
-            SSE-formatted strings
+            Encoded SSE frames
         """
         # Send initial retry interval
         yield StreamEvent(
@@ -221,12 +228,12 @@ class SSEStreamer:
                         yield error_event.to_sse()
                         break
             
-            # Send completion event with aggregation
+            # Send completion summary; content itself already went out as deltas
             if include_aggregation:
                 complete_event = StreamEvent(
                     event=StreamEventType.COMPLETE,
                     data={
-                        "content": self.aggregator.get_aggregated(),
+                        "content_len": self.aggregator.total_size,
                         "tool_calls": self.aggregator.get_tool_calls(),
                         "metadata": self.aggregator.metadata
                     },
@@ -250,6 +257,18 @@ class SSEStreamer:
             # This just keeps the connection alive
 
 
+def _empty_tool_call() -> Dict[str, Any]:
+    """Create an empty tool call to accumulate streamed deltas into."""
+    return {
+        'id': '',
+        'type': 'function',
+        'function': {
+            'name': '',
+            'arguments': ''
+        }
+    }
+
+
 class DeltaStreamProcessor:
     """
     Process delta streams for tool calls and content.
@@ -257,8 +276,31 @@ class DeltaStreamProcessor:
     
     def __init__(self):
         self.content_buffer = []
-        self.tool_call_buffer = {}
-        self.current_tool_index = None
+        # Tool calls in the order their indices were first seen. Indices are
+        # normally consecutive ints from 0, so the index is the position.
+        self.tool_call_buffer: List[Dict[str, Any]] = []
+        # Index -> position, only built once a stream sends an index that
+        # isn't the next consecutive int (None, negative, sparse, ...)
+        self._tool_call_positions: Optional[Dict[Any, int]] = None
+    
+    def _tool_call_slot(self, index: Any) -> Dict[str, Any]:
+        """Return the buffered tool call for an index, adding it if new."""
+        buffer = self.tool_call_buffer
+        
+        if self._tool_call_positions is None:
+            if type(index) is int and 0 <= index <= len(buffer):
+                if index == len(buffer):
+                    buffer.append(_empty_tool_call())
+                return buffer[index]
+            
+            # Not dense; look positions up by index from now on
+            self._tool_call_positions = {i: i for i in range(len(buffer))}
+        
+        position = self._tool_call_positions.get(index)
+        if position is None:
+            position = self._tool_call_positions[index] = len(buffer)
+            buffer.append(_empty_tool_call())
+        return buffer[position]
     
     def process_delta(self, delta: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -281,31 +323,21 @@ class DeltaStreamProcessor:
         # Handle tool call delta
         if 'tool_calls' in delta:
             for tool_call in delta['tool_calls']:
-                index = tool_call.get('index', 0)
-                
-                if index not in self.tool_call_buffer:
-                    self.tool_call_buffer[index] = {
-                        'id': '',
-                        'type': 'function',
-                        'function': {
-                            'name': '',
-                            'arguments': ''
-                        }
-                    }
+                buffered = self._tool_call_slot(tool_call.get('index', 0))
                 
                 # Accumulate tool call data
                 if 'id' in tool_call:
-                    self.tool_call_buffer[index]['id'] = tool_call['id']
+                    buffered['id'] = tool_call['id']
                 
                 if 'function' in tool_call:
                     func = tool_call['function']
                     if 'name' in func:
-                        self.tool_call_buffer[index]['function']['name'] = func['name']
+                        buffered['function']['name'] = func['name']
                     if 'arguments' in func:
-                        self.tool_call_buffer[index]['function']['arguments'] += func['arguments']
+                        buffered['function']['arguments'] += func['arguments']
             
             # Return current state of tool calls
-            result['tool_calls'] = list(self.tool_call_buffer.values())
+            result['tool_calls'] = self.tool_call_buffer[:]
         
         return result
     
@@ -313,14 +345,14 @@ class DeltaStreamProcessor:
         """Get final accumulated result."""
         return {
             'content': ''.join(self.content_buffer),
-            'tool_calls': list(self.tool_call_buffer.values()) if self.tool_call_buffer else None
+            'tool_calls': self.tool_call_buffer[:] or None
         }
     
     def reset(self) -> None:
         """Reset buffers."""
         self.content_buffer.clear()
         self.tool_call_buffer.clear()
-        self.current_tool_index = None
+        self._tool_call_positions = None
 
 
 class WarpStreamAdapter:
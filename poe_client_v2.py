@@ -7,13 +7,19 @@ This implementation is compatible with the official Python MCP SDK and includes
 support for Claude's thinking protocol.
 """
 import os
-import json
+import time
+import uuid
+import heapq
 import asyncio
+import functools
 import tempfile
-from typing import Dict, List, Optional, Any, Callable, Awaitable, Union
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Callable, Awaitable, Tuple, Union
 from pathlib import Path
 
 import httpx
+import orjson
 from loguru import logger
 
 # Import Claude compatibility module
@@ -33,6 +39,13 @@ from file_utils import (
     create_temp_file,
 )
 
+# Poe API endpoints
+AVAILABLE_MODELS_URL = "https://api.poe.com/api/available_models"
+CHAT_URL = "https://api.poe.com/api/chat"
+
+# On-disk location of the model catalog cache
+DEFAULT_MODEL_CACHE_PATH = Path.home() / ".cache" / "poe-proxy" / "models.json"
+
 
 class PoeApiError(Exception):
     """Exception raised for errors in the Poe API."""
@@ -49,6 +62,20 @@ class FileHandlingError(PoeApiError):
     pass
 
 
+@dataclass
+class Message:
+    """
+    A single message in a session's history.
+    
+    Slotted to keep per-message overhead low; orjson serializes it like the
+    equivalent ``{"role": ..., "content": ...}`` dict.
+    """
+    __slots__ = ("role", "content")
+    
+    role: str
+    content: str
+
+
 class PoeClient:
     """
     A client for the Poe API that provides methods for querying models and handling file attachments.
@@ -63,6 +90,8 @@ class PoeClient:
         debug_mode: bool = False,
         claude_compatible: bool = True,
         timeout: int = 60,
+        model_cache_ttl: int = 3600,
+        model_cache_path: Optional[Union[str, Path]] = None,
     ):
         """
         Initialize the Poe API client.
@@ -72,6 +101,9 @@ class PoeClient:
             debug_mode: Whether to enable debug mode
             claude_compatible: Whether to enable Claude compatibility
             timeout: Timeout for API requests in seconds
+            model_cache_ttl: Seconds before the cached model catalog is refreshed
+            model_cache_path: Where to persist the model catalog
+                (default: ~/.cache/poe-proxy/models.json)
         """
         self.api_key = api_key
         self.debug_mode = debug_mode
@@ -85,17 +117,30 @@ class PoeClient:
             include_in_response=False,
         )
         
-        # Initialize httpx client
+        # Initialize httpx client; one pooled HTTP/2 connection is reused
+        # across requests instead of renegotiating TCP+TLS each time
         self.client = httpx.AsyncClient(
+            http2=True,
             timeout=timeout,
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=100,
+                keepalive_expiry=60,
+            ),
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
             },
         )
         
-        # Cache for available models
-        self._available_models = None
+        # Model catalog cache, keyed by lowercased slug. Served stale-while-revalidate:
+        # stale entries are returned immediately while a refresh runs in the background.
+        self._model_cache: Dict[str, Dict[str, Any]] = {}
+        self._cache_mtime = 0.0
+        self._cache_ttl = model_cache_ttl
+        self._cache_path = Path(model_cache_path) if model_cache_path else DEFAULT_MODEL_CACHE_PATH
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._load_model_cache()
         
         if debug_mode:
             logger.info("Initialized Poe API client")
@@ -103,90 +148,191 @@ class PoeClient:
     
     async def close(self):
         """Close the httpx client."""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
         await self.client.aclose()
     
+    def _load_model_cache(self) -> None:
+        """Load the persisted model catalog from disk, if present."""
+        try:
+            with open(self._cache_path, "rb") as f:
+                data = orjson.loads(f.read())
+            
+            self._model_cache = {model["slug"].lower(): model for model in data["models"]}
+            self._cache_mtime = float(data.get("fetched_at", 0.0))
+            
+            if self.debug_mode:
+                logger.info(f"Loaded {len(self._model_cache)} models from {self._cache_path}")
+        
+        except FileNotFoundError:
+            pass
+        
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable model cache {self._cache_path}: {e}")
+    
+    def _save_model_cache(self) -> None:
+        """Persist the model catalog to disk."""
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._cache_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(
+                    {"fetched_at": self._cache_mtime, "models": list(self._model_cache.values())}
+                ))
+            os.replace(tmp_path, self._cache_path)
+        
+        except Exception as e:
+            logger.warning(f"Could not persist model cache to {self._cache_path}: {e}")
+    
+    def _is_cache_stale(self) -> bool:
+        """Check whether the model catalog is older than the cache TTL."""
+        return time.time() - self._cache_mtime > self._cache_ttl
+    
+    async def _refresh_models(self) -> None:
+        """
+        Fetch the model catalog from the Poe API and update the cache.
+        
+        Raises:
+            AuthenticationError: If the API key is invalid
+            PoeApiError: If the catalog could not be fetched
+        """
+        try:
+            response = await self.client.get(AVAILABLE_MODELS_URL)
+            response.raise_for_status()
+            
+            data = orjson.loads(response.content)
+            self._model_cache = {model["slug"].lower(): model for model in data["models"]}
+            self._cache_mtime = time.time()
+            
+            if self.debug_mode:
+                logger.info(f"Available models: {list(self._model_cache)}")
+        
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 401:
+                raise AuthenticationError("Invalid API key")
+            else:
+                raise PoeApiError(f"HTTP error: {e}")
+        
+        except Exception as e:
+            raise PoeApiError(f"Error getting available models: {e}")
+        
+        self._save_model_cache()
+    
+    async def _background_refresh(self) -> None:
+        """Refresh the model catalog, keeping stale data on failure."""
+        try:
+            await self._refresh_models()
+        except Exception as e:
+            logger.warning(f"Model catalog refresh failed, serving stale data: {e}")
+    
     async def get_available_models(self, force_refresh: bool = False) -> List[str]:
         """
         Get a list of available models from the Poe API.
         
+        Cached data is returned immediately; if it is older than the cache TTL,
+        a refresh is scheduled in the background.
+        
         Args:
             force_refresh: Whether to force a refresh of the cached models
             
         Returns:
             List of available model names
         """
-        if self._available_models is None or force_refresh:
-            try:
-                response = await self.client.get("https://api.poe.com/api/available_models")
-                response.raise_for_status()
-                
-                data = response.json()
-                self._available_models = [model["slug"] for model in data["models"]]
-                
-                if self.debug_mode:
-                    logger.info(f"Available models: {self._available_models}")
-                
-                return self._available_models
-            
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
-                    raise AuthenticationError("Invalid API key")
-                else:
-                    raise PoeApiError(f"HTTP error: {e}")
-            
-            except Exception as e:
-                raise PoeApiError(f"Error getting available models: {e}")
+        if not self._model_cache or force_refresh:
+            await self._refresh_models()
+        elif self._is_cache_stale() and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._background_refresh())
         
-        return self._available_models
+        return [model["slug"] for model in self._model_cache.values()]
     
     async def get_model_info(self, model_name: str) -> Dict[str, Any]:
         """
         Get information about a specific model.
         
+        Served from the cached model catalog; only a cold cache triggers a request.
+        
         Args:
             model_name: The name of the model
             
         Returns:
             Dictionary with model information
         """
-        try:
-            # Ensure we have the available models
-            models = await self.get_available_models()
-            
-            # Find the model in the available models
-            response = await self.client.get("https://api.poe.com/api/available_models")
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            for model in data["models"]:
-                if model["slug"].lower() == model_name.lower():
-                    return {
-                        "name": model["slug"],
-                        "display_name": model.get("display_name", model["slug"]),
-                        "description": model.get("description", ""),
-                        "context_length": model.get("context_length", 4000),
-                        "supports_images": model.get("supports_images", False),
-                    }
-            
+        await self.get_available_models()
+        
+        model = self._model_cache.get(model_name.lower())
+        if model is None:
             raise ValueError(f"Model {model_name} not found")
         
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise AuthenticationError("Invalid API key")
-            else:
-                raise PoeApiError(f"HTTP error: {e}")
+        return {
+            "name": model["slug"],
+            "display_name": model.get("display_name", model["slug"]),
+            "description": model.get("description", ""),
+            "context_length": model.get("context_length", 4000),
+            "supports_images": model.get("supports_images", False),
+        }
+    
+    async def _fallback_query_model(
+        self,
+        prompt_text: str,
+        disabled_thinking: Dict[str, Any],
+        bot_name: str,
+        messages: Optional[List[Union[Message, Dict[str, str]]]],
+    ) -> Dict[str, str]:
+        """
+        Retry a query without the thinking protocol.
         
-        except Exception as e:
-            if isinstance(e, ValueError):
-                raise
-            raise PoeApiError(f"Error getting model info: {e}")
+        Args:
+            prompt_text: The prompt to send to the bot
+            disabled_thinking: Thinking parameters with the protocol disabled
+            bot_name: The name of the bot to query
+            messages: Optional list of previous messages
+            
+        Returns:
+            Dictionary with the response text
+        """
+        return await self.query_model(
+            bot_name=bot_name,
+            prompt=prompt_text,
+            messages=messages,
+            stream_handler=None,  # Disable streaming for fallback
+            thinking=disabled_thinking,
+        )
+    
+    async def _fallback_query_with_file(
+        self,
+        prompt_text: str,
+        disabled_thinking: Dict[str, Any],
+        bot_name: str,
+        file_path: str,
+        messages: Optional[List[Union[Message, Dict[str, str]]]],
+    ) -> Dict[str, str]:
+        """
+        Retry a file query without the thinking protocol.
+        
+        Args:
+            prompt_text: The prompt to send to the bot
+            disabled_thinking: Thinking parameters with the protocol disabled
+            bot_name: The name of the bot to query
+            file_path: Path to the file to attach
+            messages: Optional list of previous messages
+            
+        Returns:
+            Dictionary with the response text
+        """
+        return await self.query_model_with_file(
+            bot_name=bot_name,
+            prompt=prompt_text,
+            file_path=file_path,
+            messages=messages,
+            stream_handler=None,  # Disable streaming for fallback
+            thinking=disabled_thinking,
+        )
     
     async def query_model(
         self,
         bot_name: str,
         prompt: str,
-        messages: Optional[List[Dict[str, str]]] = None,
+        messages: Optional[List[Union[Message, Dict[str, str]]]] = None,
         stream_handler: Optional[Callable[[str], Awaitable[None]]] = None,
         thinking: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, str]:
@@ -203,48 +349,53 @@ class PoeClient:
         Returns:
             Dictionary with the response text
         """
+        is_claude = self.claude_compatible and is_claude_model(bot_name)
+        
         try:
             # Format prompt with thinking protocol if applicable
             formatted_prompt = prompt
-            if self.claude_compatible and is_claude_model(bot_name):
-                # Use the thinking protocol handler
+            if is_claude:
+                # Use a per-call handler when parameters are given, so
+                # concurrent queries never overwrite the shared defaults
+                claude_thinking = self.claude_thinking
                 if thinking is not None:
-                    # Update the thinking protocol handler with the provided parameters
-                    self.claude_thinking.enabled = thinking.get("enabled", True)
-                    if "template" in thinking:
-                        self.claude_thinking.template = thinking["template"]
-                    if "include_in_response" in thinking:
-                        self.claude_thinking.include_in_response = thinking["include_in_response"]
+                    claude_thinking = ClaudeThinkingProtocol(
+                        enabled=thinking.get("enabled", True),
+                        template=thinking.get("template", self.claude_thinking.template),
+                        include_in_response=thinking.get(
+                            "include_in_response", self.claude_thinking.include_in_response
+                        ),
+                    )
                 
-                formatted_prompt = self.claude_thinking.format_prompt(prompt, bot_name)
+                formatted_prompt = claude_thinking.format_prompt(prompt, bot_name)
                 
                 if self.debug_mode:
                     logger.debug(f"Formatted prompt with thinking protocol: {formatted_prompt}")
             
-            # Prepare the request payload
-            payload = {
-                "bot": bot_name,
-                "message": formatted_prompt,
-            }
-            
-            # Add previous messages if provided
+            # Serialize the request payload, adding previous messages if provided
             if messages:
-                payload["conversation_id"] = "mcp_session"
-                payload["message_history"] = messages
+                body = orjson.dumps({
+                    "bot": bot_name,
+                    "message": formatted_prompt,
+                    "conversation_id": "mcp_session",
+                    "message_history": messages,
+                })
+            else:
+                body = orjson.dumps({"bot": bot_name, "message": formatted_prompt})
             
-            # Make the API request
-            response = await self.client.post(
-                "https://api.poe.com/api/chat",
-                json=payload,
-            )
+            # Make the API request; the client already sends
+            # Content-Type: application/json by default
+            response = await self.client.post(CHAT_URL, content=body)
             response.raise_for_status()
             
-            data = response.json()
-            response_text = data.get("response", "")
+            # An empty body means an empty reply; skip the decode
+            response_text = ""
+            if response.content:
+                response_text = orjson.loads(response.content).get("response", "")
             
             # Process the response with thinking protocol if applicable
-            if self.claude_compatible and is_claude_model(bot_name):
-                processed = self.claude_thinking.process_response(response_text)
+            if is_claude:
+                processed = claude_thinking.process_response(response_text)
                 return {
                     "text": processed["response"],
                     "thinking": processed.get("thinking", ""),
@@ -257,20 +408,13 @@ class PoeClient:
                 raise AuthenticationError("Invalid API key")
             else:
                 error_text = f"HTTP error: {e}"
-                if self.claude_compatible and is_claude_model(bot_name):
+                if is_claude:
                     # Try fallback without thinking protocol
-                    async def fallback_query(prompt_text, disabled_thinking):
-                        return await self.query_model(
-                            bot_name=bot_name,
-                            prompt=prompt_text,
-                            messages=messages,
-                            stream_handler=None,  # Disable streaming for fallback
-                            thinking=disabled_thinking,
-                        )
-                    
                     return await handle_claude_error(
                         error=e,
-                        fallback_handler=fallback_query,
+                        fallback_handler=functools.partial(
+                            self._fallback_query_model, bot_name=bot_name, messages=messages
+                        ),
                         prompt=prompt,
                         model_name=bot_name,
                         thinking=thinking,
@@ -280,20 +424,13 @@ class PoeClient:
         
         except Exception as e:
             error_text = f"Error querying model: {e}"
-            if self.claude_compatible and is_claude_model(bot_name):
+            if is_claude:
                 # Try fallback without thinking protocol
-                async def fallback_query(prompt_text, disabled_thinking):
-                    return await self.query_model(
-                        bot_name=bot_name,
-                        prompt=prompt_text,
-                        messages=messages,
-                        stream_handler=None,  # Disable streaming for fallback
-                        thinking=disabled_thinking,
-                    )
-                
                 return await handle_claude_error(
                     error=e,
-                    fallback_handler=fallback_query,
+                    fallback_handler=functools.partial(
+                        self._fallback_query_model, bot_name=bot_name, messages=messages
+                    ),
                     prompt=prompt,
                     model_name=bot_name,
                     thinking=thinking,
@@ -306,7 +443,7 @@ class PoeClient:
         bot_name: str,
         prompt: str,
         file_path: str,
-        messages: Optional[List[Dict[str, str]]] = None,
+        messages: Optional[List[Union[Message, Dict[str, str]]]] = None,
         stream_handler: Optional[Callable[[str], Awaitable[None]]] = None,
         thinking: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, str]:
@@ -357,19 +494,14 @@ class PoeClient:
             error_text = f"Error querying model with file: {e}"
             if self.claude_compatible and is_claude_model(bot_name):
                 # Try fallback without thinking protocol
-                async def fallback_query(prompt_text, disabled_thinking):
-                    return await self.query_model_with_file(
+                return await handle_claude_error(
+                    error=e,
+                    fallback_handler=functools.partial(
+                        self._fallback_query_with_file,
                         bot_name=bot_name,
-                        prompt=prompt_text,
                         file_path=file_path,
                         messages=messages,
-                        stream_handler=None,  # Disable streaming for fallback
-                        thinking=disabled_thinking,
-                    )
-                
-                return await handle_claude_error(
-                    error=e,
-                    fallback_handler=fallback_query,
+                    ),
                     prompt=prompt,
                     model_name=bot_name,
                     thinking=thinking,
@@ -384,6 +516,12 @@ class SessionManager:
     
     This class provides methods for creating, retrieving, updating, and deleting sessions,
     as well as managing session expiry.
+    
+    Sessions are kept in last-access order, and a min-heap of
+    ``(expiry_ts, session_id)`` entries lets cleanup stop at the first
+    unexpired entry instead of scanning every session. Touching a session
+    pushes a fresh heap entry; older entries for the same session are
+    skipped lazily when popped.
     """
     
     def __init__(self, expiry_minutes: int = 60):
@@ -393,9 +531,31 @@ class SessionManager:
         Args:
             expiry_minutes: The number of minutes after which a session expires
         """
-        self.sessions = {}
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.expiry_minutes = expiry_minutes
         self.expiry_seconds = expiry_minutes * 60
+        self._expiry_heap: List[Tuple[float, str]] = []
+    
+    def _touch(self, session_id: str) -> None:
+        """
+        Mark a session as accessed now.
+        
+        Args:
+            session_id: The session ID
+        """
+        now = time.monotonic()
+        self.sessions[session_id]["last_access"] = now
+        self.sessions.move_to_end(session_id)
+        heapq.heappush(self._expiry_heap, (now + self.expiry_seconds, session_id))
+        
+        # Frequent touches leave superseded entries behind; rebuild the heap
+        # from live sessions once they dominate it
+        if len(self._expiry_heap) > 4 * len(self.sessions) + 64:
+            self._expiry_heap = [
+                (session["last_access"] + self.expiry_seconds, sid)
+                for sid, session in self.sessions.items()
+            ]
+            heapq.heapify(self._expiry_heap)
     
     def get_or_create_session(self, session_id: Optional[str] = None) -> str:
         """
@@ -409,22 +569,20 @@ class SessionManager:
         """
         if session_id and session_id in self.sessions:
             # Update the last access time
-            self.sessions[session_id]["last_access"] = asyncio.get_event_loop().time()
+            self._touch(session_id)
             return session_id
         
-        # Create a new session ID
-        import uuid
-        new_session_id = str(uuid.uuid4())
-        
         # Create a new session
+        new_session_id = uuid.uuid4().hex
         self.sessions[new_session_id] = {
             "messages": [],
-            "last_access": asyncio.get_event_loop().time(),
+            "last_access": 0.0,
         }
+        self._touch(new_session_id)
         
         return new_session_id
     
-    def get_messages(self, session_id: str) -> List[Dict[str, str]]:
+    def get_messages(self, session_id: str) -> List[Message]:
         """
         Get the messages for a session.
         
@@ -436,7 +594,7 @@ class SessionManager:
         """
         if session_id in self.sessions:
             # Update the last access time
-            self.sessions[session_id]["last_access"] = asyncio.get_event_loop().time()
+            self._touch(session_id)
             return self.sessions[session_id]["messages"]
         
         return []
@@ -460,17 +618,11 @@ class SessionManager:
         """
         if session_id in self.sessions:
             # Add the messages to the session
-            self.sessions[session_id]["messages"].append({
-                "role": "user",
-                "content": user_message,
-            })
-            self.sessions[session_id]["messages"].append({
-                "role": "assistant",
-                "content": bot_message,
-            })
+            self.sessions[session_id]["messages"].append(Message("user", user_message))
+            self.sessions[session_id]["messages"].append(Message("assistant", bot_message))
             
             # Update the last access time
-            self.sessions[session_id]["last_access"] = asyncio.get_event_loop().time()
+            self._touch(session_id)
             
             return True
         
@@ -487,6 +639,7 @@ class SessionManager:
             True if the session was deleted, False otherwise
         """
         if session_id in self.sessions:
+            # Any heap entries left behind are discarded during cleanup
             del self.sessions[session_id]
             return True
         
@@ -499,16 +652,21 @@ class SessionManager:
         Returns:
             The number of sessions that were cleaned up
         """
-        current_time = asyncio.get_event_loop().time()
-        expired_sessions = []
+        current_time = time.monotonic()
+        heap = self._expiry_heap
+        cleaned = 0
         
-        # Find expired sessions
-        for session_id, session in self.sessions.items():
-            if current_time - session["last_access"] > self.expiry_seconds:
-                expired_sessions.append(session_id)
-        
-        # Delete expired sessions
-        for session_id in expired_sessions:
+        while heap and heap[0][0] <= current_time:
+            _, session_id = heapq.heappop(heap)
+            session = self.sessions.get(session_id)
+            
+            # Skip entries for deleted sessions or superseded by a later touch
+            if session is None:
+                continue
+            if session["last_access"] + self.expiry_seconds > current_time:
+                continue
+            
             del self.sessions[session_id]
+            cleaned += 1
         
-        return len(expired_sessions)
\ No newline at end of file
+        return cleaned
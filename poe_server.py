@@ -8,6 +8,7 @@ and sharing files. The server supports both STDIO and SSE transports.
 import os
 import asyncio
 import tempfile
+from contextlib import suppress
 from typing import Dict, List, Optional, AsyncGenerator, Any, Union
 from fastmcp import FastMCP
 import fastapi_poe as fp
@@ -21,6 +22,8 @@ from utils import (
     PoeApiError,
     FileHandlingError,
     handle_exception,
+    make_progress_handler,
+    cleanup_sessions_task,
 )
 
 from poe_client import (
@@ -49,7 +52,14 @@ poe_client = PoeClient(
     debug_mode=config.debug_mode,
     claude_compatible=config.claude_compatible,
 )
-session_manager = SessionManager(expiry_minutes=config.session_expiry_minutes)
+session_manager = SessionManager(
+    expiry_minutes=config.session_expiry_minutes,
+    max_sessions=config.max_sessions,
+)
+
+
+# Stream handler for the Poe client, or None when progress isn't supported
+_progress_handler = make_progress_handler(mcp)
 
 
 # Define models for the MCP tools
@@ -135,17 +145,12 @@ async def ask_poe(
         # Get messages from session
         messages = session_manager.get_messages(current_session_id)
         
-        # Define stream handler for progress updates
-        async def stream_handler(text: str):
-            if hasattr(mcp, "yield_progress"):
-                await mcp.yield_progress({"text": text})
-        
         # Query the Poe model
         response = await poe_client.query_model(
             bot_name=bot,
             prompt=prompt,
             messages=messages,
-            stream_handler=stream_handler,
+            stream_handler=_progress_handler,
             thinking=thinking,
         )
         
@@ -200,8 +205,10 @@ async def ask_with_attachment(
         Response from the bot and session information
     """
     try:
-        # Validate file
-        validate_file(attachment_path, max_size_mb=config.max_file_size_mb)
+        # Validate file without blocking the event loop on stat calls
+        await asyncio.get_running_loop().run_in_executor(
+            None, validate_file, attachment_path, config.max_file_size_mb
+        )
         
         # Get or create session
         current_session_id = session_manager.get_or_create_session(session_id)
@@ -209,18 +216,13 @@ async def ask_with_attachment(
         # Get messages from session
         messages = session_manager.get_messages(current_session_id)
         
-        # Define stream handler for progress updates
-        async def stream_handler(text: str):
-            if hasattr(mcp, "yield_progress"):
-                await mcp.yield_progress({"text": text})
-        
         # Query the Poe model with the file
         response = await poe_client.query_model_with_file(
             bot_name=bot,
             prompt=prompt,
             file_path=attachment_path,
             messages=messages,
-            stream_handler=stream_handler,
+            stream_handler=_progress_handler,
             thinking=thinking,
         )
         
@@ -343,24 +345,8 @@ def get_server_info() -> Dict[str, Any]:
         }
 
 
-# Periodic task to clean up expired sessions
-async def cleanup_sessions_task():
-    """Periodically clean up expired sessions."""
-    while True:
-        try:
-            # Clean up expired sessions
-            num_cleaned = session_manager.cleanup_expired_sessions()
-            
-            if num_cleaned > 0:
-                logger.info(f"Cleaned up {num_cleaned} expired sessions")
-            
-            # Sleep for 15 minutes
-            await asyncio.sleep(15 * 60)
-        
-        except Exception as e:
-            logger.error(f"Error in cleanup_sessions_task: {str(e)}")
-            # Sleep for 1 minute before retrying
-            await asyncio.sleep(60)
+# Handle to the cleanup task; the event loop only keeps a weak reference
+_cleanup_task: Optional[asyncio.Task] = None
 
 
 # Start the cleanup task when the server starts
@@ -371,7 +357,19 @@ async def startup():
     logger.info(f"Claude compatibility mode: {config.claude_compatible}")
     
     # Start the session cleanup task
-    asyncio.create_task(cleanup_sessions_task())
+    global _cleanup_task
+    _cleanup_task = asyncio.create_task(cleanup_sessions_task(session_manager))
+
+
+@mcp.on_shutdown
+async def shutdown():
+    """Stop background tasks and release shared resources when the server stops."""
+    if _cleanup_task is not None:
+        _cleanup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _cleanup_task
+    
+    await poe_client.close()
 
 
 def main():
@@ -16,10 +16,15 @@ Features:
 """
 import os
 import asyncio
+import builtins
+import functools
 import json
+from contextlib import asynccontextmanager, suppress
 from typing import Dict, List, Optional, Any, Union
+import httpx
+import orjson
+from cachetools import TTLCache
 from fastmcp import FastMCP
-from pydantic import BaseModel, Field
 
 # Import both clients for dual support
 from poe_client import PoeClient, SessionManager
@@ -40,30 +45,112 @@ from utils import (
     PoeApiError,
     FileHandlingError,
     handle_exception,
+    install_uvloop,
+    make_progress_handler,
+    cleanup_sessions_task,
 )
 
 # Initialize logging and configuration
 config = get_config()
 logger = setup_logging(config.debug_mode)
 
+async def warm_up_connection():
+    """
+    Open the pooled POE connection ahead of the first tool call.
+    
+    A cheap model listing pays the DNS, TCP and TLS handshakes at startup so
+    the first real request reuses a keep-alive connection.
+    """
+    try:
+        await openai_http_client.get(
+            f"{POE_BASE_URL}/models",
+            headers={"Authorization": f"Bearer {config.poe_api_key}"},
+            timeout=5,
+        )
+        logger.debug("POE connection warmed up")
+    except httpx.HTTPError as e:
+        logger.debug(f"POE connection warm-up failed: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Run the session cleanup task and release shared clients on shutdown."""
+    cleanup_task = asyncio.create_task(cleanup_sessions_task(session_manager))
+    warmup_task = asyncio.create_task(warm_up_connection())
+    try:
+        yield
+    finally:
+        for task in (warmup_task, cleanup_task):
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        
+        await session_manager.flush()
+        if _legacy_client is not None:
+            await _legacy_client.close()
+        await openai_client.close()
+
+
 # Create FastMCP server
-mcp = FastMCP("POE Proxy MCP Server v2 - OpenAI Compatible")
+mcp = FastMCP("POE Proxy MCP Server v2 - OpenAI Compatible", lifespan=lifespan)
 
-# Initialize both clients
-legacy_client = PoeClient(
-    api_key=config.poe_api_key,
-    debug_mode=config.debug_mode,
-    claude_compatible=config.claude_compatible,
+# Legacy client, created on first use since most calls go through the
+# OpenAI-compatible client
+_legacy_client: Optional[PoeClient] = None
+
+
+def get_legacy_client() -> PoeClient:
+    """Return the shared legacy Poe client, creating it on first use."""
+    global _legacy_client
+    if _legacy_client is None:
+        _legacy_client = PoeClient(
+            api_key=config.poe_api_key,
+            debug_mode=config.debug_mode,
+            claude_compatible=config.claude_compatible,
+        )
+    return _legacy_client
+
+
+# One HTTP/2 connection pool shared by every OpenAI-compatible call, so
+# concurrent tool invocations multiplex instead of queueing on handshakes
+openai_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(
+        max_connections=1000,
+        max_keepalive_connections=200,
+        keepalive_expiry=60,
+    ),
 )
 
+POE_BASE_URL = "https://api.poe.com/v1"
+POE_CHAT_COMPLETIONS_URL = f"{POE_BASE_URL}/chat/completions"
+MEDIA_GENERATION_TIMEOUT = 600.0
+
 openai_client = PoeOpenAIClient(
     api_key=config.poe_api_key,
-    base_url="https://api.poe.com/v1",
+    base_url=POE_BASE_URL,
     async_mode=True,
     debug_mode=config.debug_mode,
+    http_client=openai_http_client,
 )
 
-session_manager = SessionManager(expiry_minutes=config.session_expiry_minutes)
+session_manager = SessionManager(
+    expiry_minutes=config.session_expiry_minutes,
+    max_sessions=config.max_sessions,
+)
+
+# Caps in-flight OpenAI-compatible calls so bursts queue here instead of
+# tripping Poe's rate limits and burning client retries
+_poe_semaphore = asyncio.Semaphore(config.max_concurrency)
+
+# Responses to stateless temperature-0 completions, keyed by request
+# parameters; repeats are served without another Poe call
+_completion_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+_completion_cache_stats = {"hits": 0, "misses": 0}
+
+
+# Stream handler for the Poe client, or None when progress isn't supported
+_progress_handler = make_progress_handler(mcp)
 
 # Register example tools
 openai_client.register_tool("get_weather", example_get_weather, "Get weather information", 
@@ -72,30 +159,90 @@ openai_client.register_tool("calculate", example_calculate, "Perform calculation
                            EXAMPLE_TOOL_DEFINITIONS[1]["function"]["parameters"])
 
 
-# Enhanced request models with OpenAI parameters
-class EnhancedQueryRequest(BaseModel):
-    """Enhanced query request with OpenAI-compatible parameters."""
-    bot: str = Field(description="Model name (e.g., 'Claude-Opus-4.1', 'Gemini-2.5-Pro')")
-    prompt: str = Field(description="The prompt to send")
-    session_id: Optional[str] = Field(default=None, description="Session ID for context")
-    use_openai_client: bool = Field(default=True, description="Use OpenAI-compatible client")
-    max_tokens: Optional[int] = Field(default=None, description="Maximum tokens to generate")
-    temperature: Optional[float] = Field(default=None, ge=0, le=2, description="Sampling temperature")
-    top_p: Optional[float] = Field(default=None, ge=0, le=1, description="Nucleus sampling")
-    stop: Optional[List[str]] = Field(default=None, description="Stop sequences")
-    stream: bool = Field(default=False, description="Enable streaming")
-
-
-class FunctionCallRequest(BaseModel):
-    """Request for function calling."""
-    bot: str = Field(description="Model name")
-    prompt: str = Field(description="The prompt")
-    tools: List[Dict[str, Any]] = Field(description="Tool definitions in OpenAI format")
-    tool_choice: Optional[Union[str, Dict]] = Field(default="auto", description="Tool selection")
-    parallel_tool_calls: Optional[bool] = Field(default=True, description="Enable parallel execution")
-    session_id: Optional[str] = Field(default=None, description="Session ID")
-    max_tokens: Optional[int] = Field(default=None, description="Max tokens")
-    temperature: Optional[float] = Field(default=None, ge=0, le=2)
+async def _ask_poe_v2_stream(
+    bot: str,
+    messages: List[Dict[str, Any]],
+    current_session_id: str,
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    top_p: Optional[float],
+    stop: Optional[List[str]],
+) -> Dict[str, Any]:
+    """Streaming branch of ask_poe_v2 for the OpenAI-compatible client."""
+    async with _poe_semaphore:
+        response = await openai_client.chat_completion(
+            model=bot,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            stop=stop,
+            stream=True,
+            user=current_session_id,
+            auto_execute_tools=False,
+        )
+    
+    return {
+        "stream": response,
+        "session_id": current_session_id,
+    }
+
+
+async def _ask_poe_v2_completion(
+    bot: str,
+    prompt: str,
+    messages: List[Dict[str, Any]],
+    session_id: Optional[str],
+    current_session_id: str,
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    top_p: Optional[float],
+    stop: Optional[List[str]],
+) -> Dict[str, Any]:
+    """Non-streaming branch of ask_poe_v2 for the OpenAI-compatible client."""
+    # Deterministic one-shot requests are a pure function of their
+    # parameters, so they can be answered from the cache
+    cache_key = None
+    if session_id is None and temperature == 0:
+        cache_key = (bot, prompt, max_tokens, top_p, tuple(stop or ()))
+    
+    response = _completion_cache.get(cache_key) if cache_key else None
+    if response is not None:
+        _completion_cache_stats["hits"] += 1
+    else:
+        async with _poe_semaphore:
+            response = await openai_client.chat_completion(
+                model=bot,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                stop=stop,
+                stream=False,
+                user=current_session_id,
+                auto_execute_tools=False,
+            )
+        
+        if cache_key:
+            _completion_cache_stats["misses"] += 1
+            _completion_cache[cache_key] = response
+    
+    choice = response["choices"][0]
+    response_text = choice["message"]["content"]
+    
+    session_manager.update_session(
+        session_id=current_session_id,
+        user_message=prompt,
+        bot_message=response_text,
+    )
+    
+    return {
+        "text": response_text,
+        "session_id": current_session_id,
+        "model": response["model"],
+        "usage": response.get("usage", {}),
+        "finish_reason": choice["finish_reason"],
+    }
 
 
 @mcp.tool()
@@ -134,71 +281,38 @@ async def ask_poe_v2(
         current_session_id = session_manager.get_or_create_session(session_id)
         
         if use_openai_client:
-            # Use OpenAI-compatible client
-            messages = []
-            
-            # Get session messages if available
-            if current_session_id:
-                session_messages = session_manager.get_messages(current_session_id)
-                for msg in session_messages:
-                    messages.append({
-                        "role": msg.role,
-                        "content": msg.content
-                    })
+            # Use OpenAI-compatible client with the session transcript
+            # plus the current prompt
+            messages = [
+                *session_manager.get_openai_messages(current_session_id),
+                {"role": "user", "content": prompt},
+            ]
             
-            # Add current prompt
-            messages.append({"role": "user", "content": prompt})
-            
-            # Make OpenAI-compatible call
-            response = await openai_client.chat_completion(
-                model=bot,
+            request = dict(
+                bot=bot,
                 messages=messages,
+                current_session_id=current_session_id,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 top_p=top_p,
                 stop=stop,
-                stream=stream,
-                user=current_session_id,
-                auto_execute_tools=False,
             )
-            
             if stream:
-                # Return streaming generator
-                return {
-                    "stream": response,
-                    "session_id": current_session_id,
-                }
-            
-            # Extract response text
-            response_text = response["choices"][0]["message"]["content"]
-            
-            # Update session
-            session_manager.update_session(
-                session_id=current_session_id,
-                user_message=prompt,
-                bot_message=response_text,
+                return await _ask_poe_v2_stream(**request)
+            return await _ask_poe_v2_completion(
+                **request,
+                prompt=prompt,
+                session_id=session_id,
             )
-            
-            return {
-                "text": response_text,
-                "session_id": current_session_id,
-                "model": response["model"],
-                "usage": response.get("usage", {}),
-                "finish_reason": response["choices"][0]["finish_reason"],
-            }
         else:
             # Use legacy client for backward compatibility
             messages = session_manager.get_messages(current_session_id)
             
-            async def stream_handler(text: str):
-                if hasattr(mcp, "yield_progress"):
-                    await mcp.yield_progress({"text": text})
-            
-            response = await legacy_client.query_model(
+            response = await get_legacy_client().query_model(
                 bot_name=bot,
                 prompt=prompt,
                 messages=messages,
-                stream_handler=stream_handler if not stream else None,
+                stream_handler=_progress_handler if not stream else None,
             )
             
             session_manager.update_session(
@@ -259,37 +373,33 @@ async def ask_poe_with_tools(
     try:
         current_session_id = session_manager.get_or_create_session(session_id)
         
-        # Get session messages
-        messages = []
-        if current_session_id:
-            session_messages = session_manager.get_messages(current_session_id)
-            for msg in session_messages:
-                messages.append({
-                    "role": msg.role,
-                    "content": msg.content
-                })
-        
-        # Add current prompt
-        messages.append({"role": "user", "content": prompt})
+        # Session transcript plus the current prompt
+        messages = [
+            *session_manager.get_openai_messages(current_session_id),
+            {"role": "user", "content": prompt},
+        ]
         
         logger.info(f"Calling {bot} with {len(tools)} tools available")
         
         # Make OpenAI-compatible call with tools
-        response = await openai_client.chat_completion(
-            model=bot,
-            messages=messages,
-            tools=tools,
-            tool_choice=tool_choice,
-            parallel_tool_calls=parallel_tool_calls,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            user=current_session_id,
-            auto_execute_tools=True,  # Automatically execute tool calls
-        )
+        async with _poe_semaphore:
+            response = await openai_client.chat_completion(
+                model=bot,
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                parallel_tool_calls=parallel_tool_calls,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                user=current_session_id,
+                auto_execute_tools=True,  # Automatically execute tool calls
+            )
         
         # Extract response
-        response_text = response["choices"][0]["message"]["content"]
-        tool_calls = response["choices"][0]["message"].get("tool_calls", [])
+        choice = response["choices"][0]
+        message = choice["message"]
+        response_text = message["content"]
+        tool_calls = message.get("tool_calls", [])
         
         # Update session
         session_manager.update_session(
@@ -304,7 +414,7 @@ async def ask_poe_with_tools(
             "model": response["model"],
             "tool_calls": tool_calls,
             "usage": response.get("usage", {}),
-            "finish_reason": response["choices"][0]["finish_reason"],
+            "finish_reason": choice["finish_reason"],
         }
         
     except Exception as e:
@@ -312,6 +422,41 @@ async def ask_poe_with_tools(
         return openai_client.map_error_to_openai_format(e)
 
 
+async def _post_chat_completion(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send a single-shot chat completion straight to POE.
+    
+    Image and video generation need no tool routing, streaming or session
+    history, so they skip the OpenAI client layer and its response models.
+    
+    Args:
+        payload: Chat completion request body
+        
+    Returns:
+        Decoded JSON response
+    """
+    if payload.get("user") is None:
+        del payload["user"]
+    
+    async with _poe_semaphore:
+        response = await openai_http_client.post(
+            POE_CHAT_COMPLETIONS_URL,
+            content=orjson.dumps(payload),
+            headers={
+                "Authorization": f"Bearer {config.poe_api_key}",
+                "Content-Type": "application/json",
+            },
+            timeout=MEDIA_GENERATION_TIMEOUT,
+        )
+    
+    if response.status_code == 401:
+        raise AuthenticationError(f"POE API authentication failed: {response.text}")
+    if response.status_code >= 400:
+        raise PoeApiError(f"POE API error {response.status_code}: {response.text}")
+    
+    return orjson.loads(response.content)
+
+
 @mcp.tool()
 async def generate_image(
     prompt: str,
@@ -330,17 +475,18 @@ async def generate_image(
         Response with generated image or URL
     """
     try:
-        current_session_id = session_manager.get_or_create_session(session_id)
-        
-        messages = [{"role": "user", "content": prompt}]
+        # Generation is stateless, so only reuse a session the caller passed
+        current_session_id = session_manager.get_or_create_session(
+            session_id, create_if_missing=False
+        )
         
         # Image generation should use stream=False as per documentation
-        response = await openai_client.chat_completion(
-            model=model,
-            messages=messages,
-            stream=False,
-            user=current_session_id,
-        )
+        response = await _post_chat_completion({
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": False,
+            "user": current_session_id,
+        })
         
         response_content = response["choices"][0]["message"]["content"]
         
@@ -374,17 +520,18 @@ async def generate_video(
         Response with generated video or URL
     """
     try:
-        current_session_id = session_manager.get_or_create_session(session_id)
-        
-        messages = [{"role": "user", "content": prompt}]
+        # Generation is stateless, so only reuse a session the caller passed
+        current_session_id = session_manager.get_or_create_session(
+            session_id, create_if_missing=False
+        )
         
         # Video generation should use stream=False as per documentation
-        response = await openai_client.chat_completion(
-            model=model,
-            messages=messages,
-            stream=False,
-            user=current_session_id,
-        )
+        response = await _post_chat_completion({
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": False,
+            "user": current_session_id,
+        })
         
         response_content = response["choices"][0]["message"]["content"]
         
@@ -400,6 +547,34 @@ async def generate_video(
         return openai_client.map_error_to_openai_format(e)
 
 
+# Static model catalog served by list_available_models_v2
+_MODELS_V2 = {
+    "text_models": [
+        {"name": "Claude-Opus-4.1", "supports_tools": True, "max_tokens": 100000},
+        {"name": "Claude-Sonnet-4", "supports_tools": True, "max_tokens": 100000},
+        {"name": "Gemini-2.5-Pro", "supports_tools": True, "max_tokens": 100000},
+        {"name": "GPT-4.1", "supports_tools": True, "max_tokens": 128000},
+        {"name": "Grok-4", "supports_tools": True, "max_tokens": 100000},
+        {"name": "Llama-3.1-405B", "supports_tools": False, "max_tokens": 100000},
+    ],
+    "image_models": [
+        {"name": "GPT-Image-1", "type": "image_generation"},
+    ],
+    "video_models": [
+        {"name": "Veo-3", "type": "video_generation"},
+    ],
+    "features": {
+        "function_calling": True,
+        "parallel_tools": True,
+        "streaming": True,
+        "temperature_control": True,
+        "max_tokens_control": True,
+        "stop_sequences": True,
+        "usage_tracking": True,
+    }
+}
+
+
 @mcp.tool()
 async def list_available_models_v2() -> Dict[str, Any]:
     """
@@ -407,33 +582,27 @@ async def list_available_models_v2() -> Dict[str, Any]:
     
     Returns updated model list including new models and their features.
     """
-    models = {
-        "text_models": [
-            {"name": "Claude-Opus-4.1", "supports_tools": True, "max_tokens": 100000},
-            {"name": "Claude-Sonnet-4", "supports_tools": True, "max_tokens": 100000},
-            {"name": "Gemini-2.5-Pro", "supports_tools": True, "max_tokens": 100000},
-            {"name": "GPT-4.1", "supports_tools": True, "max_tokens": 128000},
-            {"name": "Grok-4", "supports_tools": True, "max_tokens": 100000},
-            {"name": "Llama-3.1-405B", "supports_tools": False, "max_tokens": 100000},
-        ],
-        "image_models": [
-            {"name": "GPT-Image-1", "type": "image_generation"},
-        ],
-        "video_models": [
-            {"name": "Veo-3", "type": "video_generation"},
-        ],
-        "features": {
-            "function_calling": True,
-            "parallel_tools": True,
-            "streaming": True,
-            "temperature_control": True,
-            "max_tokens_control": True,
-            "stop_sequences": True,
-            "usage_tracking": True,
-        }
-    }
-    
-    return models
+    return _MODELS_V2
+
+
+# Builtins visible to custom tool code. This narrows what casual code can
+# reach (no imports, file or eval access) but is not a security boundary.
+_SAFE_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        "abs", "all", "any", "bool", "dict", "divmod", "enumerate", "filter",
+        "float", "format", "int", "isinstance", "len", "list", "map", "max",
+        "min", "pow", "print", "range", "repr", "reversed", "round", "set",
+        "sorted", "str", "sum", "tuple", "zip",
+        "Exception", "KeyError", "TypeError", "ValueError",
+    )
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_tool(implementation: str):
+    """Compile custom tool source once; re-registering identical code reuses it."""
+    return compile(implementation, "<custom_tool>", "exec")
 
 
 @mcp.tool()
@@ -450,20 +619,21 @@ async def register_custom_tool(
         name: Tool name
         description: Tool description
         parameters: JSON schema for parameters
-        implementation: Python code as string (will be exec'd)
+        implementation: Python code as string (exec'd with a restricted set
+            of builtins; imports are not available)
         
     Returns:
         Registration status
     """
     try:
-        # Create function from implementation string
-        exec_globals = {}
-        exec(implementation, exec_globals)
+        # Create function from implementation string with restricted builtins
+        namespace = {"__builtins__": _SAFE_BUILTINS}
+        exec(_compile_tool(implementation), namespace)
         
         # Find the function in exec'd code
         func = None
-        for item in exec_globals.values():
-            if callable(item) and not item.__name__.startswith('_'):
+        for key, item in namespace.items():
+            if key != "__builtins__" and callable(item) and not item.__name__.startswith('_'):
                 func = item
                 break
         
@@ -486,6 +656,33 @@ async def register_custom_tool(
         }
 
 
+# Server information fixed at import; only the tool registry changes later
+_SERVER_INFO_V2 = {
+    "version": "2.0.0",
+    "features": {
+        "legacy_client": True,
+        "openai_client": True,
+        "function_calling": True,
+        "multi_modal": True,
+        "streaming": True,
+        "rate_limiting": True,
+        "async_backoff": True,
+        "usage_tracking": True,
+    },
+    "configuration": {
+        "debug_mode": config.debug_mode,
+        "claude_compatible": config.claude_compatible,
+        "max_file_size_mb": config.max_file_size_mb,
+        "session_expiry_minutes": config.session_expiry_minutes,
+        "max_concurrency": config.max_concurrency,
+    },
+    "api_endpoints": {
+        "poe_legacy": "fastapi_poe",
+        "poe_openai": "https://api.poe.com/v1",
+    },
+}
+
+
 @mcp.tool()
 async def get_server_info_v2() -> Dict[str, Any]:
     """
@@ -494,27 +691,13 @@ async def get_server_info_v2() -> Dict[str, Any]:
     Returns enhanced server information including OpenAI compatibility.
     """
     return {
-        "version": "2.0.0",
-        "features": {
-            "legacy_client": True,
-            "openai_client": True,
-            "function_calling": True,
-            "multi_modal": True,
-            "streaming": True,
-            "rate_limiting": True,
-            "usage_tracking": True,
-        },
-        "configuration": {
-            "debug_mode": config.debug_mode,
-            "claude_compatible": config.claude_compatible,
-            "max_file_size_mb": config.max_file_size_mb,
-            "session_expiry_minutes": config.session_expiry_minutes,
+        **_SERVER_INFO_V2,
+        "registered_tools": list(TOOL_REGISTRY),
+        "completion_cache": {
+            "size": len(_completion_cache),
+            "maxsize": _completion_cache.maxsize,
+            **_completion_cache_stats,
         },
-        "api_endpoints": {
-            "poe_legacy": "fastapi_poe",
-            "poe_openai": "https://api.poe.com/v1",
-        },
-        "registered_tools": list(TOOL_REGISTRY.keys()),
     }
 
 
@@ -524,6 +707,8 @@ def main():
     import sys
     from fastmcp.server import stdio_server
     
+    install_uvloop()
+    
     logger.info("Starting POE Proxy MCP Server v2 with OpenAI compatibility")
     stdio_server(mcp)
 
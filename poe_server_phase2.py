@@ -12,19 +12,19 @@ Complete implementation with:
 import os
 import sys
 import asyncio
+import functools
+import hashlib
 import time
-from typing import Dict, List, Optional, Any, Union
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any, Union
+import orjson
+from cachetools import LRUCache
 from fastmcp import FastMCP
 from pydantic import BaseModel, Field
 from loguru import logger
 
 # Import Phase 2 modules
 from poe_client.rate_limiter import rate_limiter, with_rate_limit
-from poe_client.streaming import (
-    sse_streamer,
-    warp_stream_adapter,
-    DeltaStreamProcessor
-)
 from warp_context_handler import (
     warp_integration,
     WarpContextExtractor,
@@ -54,17 +54,72 @@ openai_client = PoeOpenAIClient(
     debug_mode=config.debug_mode
 )
 
+
+class ServerMetrics:
+    """Production metrics counters with fixed attribute slots."""
+    
+    __slots__ = (
+        "start_time",
+        "total_requests",
+        "successful_requests",
+        "failed_requests",
+        "total_latency_ns",
+        "total_tokens",
+        "warp_contexts_processed",
+        "commands_executed",
+        "files_created",
+    )
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self) -> None:
+        """Zero every counter and restart the uptime clock."""
+        self.start_time = time.time()
+        self.total_requests = 0
+        self.successful_requests = 0
+        self.failed_requests = 0
+        self.total_latency_ns = 0
+        self.total_tokens = 0
+        self.warp_contexts_processed = 0
+        self.commands_executed = 0
+        self.files_created = 0
+    
+    def record_success(
+        self,
+        latency_ns: int,
+        tokens: int = 0,
+        commands: int = 0,
+        files: int = 0,
+    ) -> None:
+        """
+        Record a completed request in one update.
+        
+        Args:
+            latency_ns: Request latency in nanoseconds
+            tokens: Total tokens reported by the API
+            commands: Commands executed for the request
+            files: Files created for the request
+        """
+        self.successful_requests += 1
+        self.total_latency_ns += latency_ns
+        self.total_tokens += tokens
+        self.commands_executed += commands
+        self.files_created += files
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters as a plain dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
 # Production metrics
-metrics = {
-    'start_time': time.time(),
-    'total_requests': 0,
-    'successful_requests': 0,
-    'failed_requests': 0,
-    'total_latency': 0.0,
-    'total_tokens': 0,
-    'warp_contexts_processed': 0,
-    'commands_executed': 0,
-    'files_created': 0,
+metrics = ServerMetrics()
+
+# Static configuration reported by health_check, built once at import
+_HEALTH_CONFIGURATION = {
+    "debug_mode": config.debug_mode,
+    "session_expiry_minutes": config.session_expiry_minutes,
+    "rate_limit_rpm": rate_limiter.rpm_limit,
 }
 
 
@@ -80,6 +135,98 @@ class WarpContextRequest(BaseModel):
     temperature: Optional[float] = Field(default=None, ge=0, le=2)
 
 
+async def _ask_warp_stream(
+    bot: str,
+    messages: List[Dict[str, Any]],
+    warp_context: Dict[str, Any],
+    priority: int,
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+) -> Dict[str, Any]:
+    """Streaming branch of ask_poe_with_warp_context."""
+    response_generator = await with_rate_limit(
+        openai_client.chat_completion,
+        model=bot,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True,
+        priority=priority
+    )
+    
+    # Convert to Warp blocks; streaming support loads on first use
+    from poe_client.streaming import warp_stream_adapter
+    warp_blocks_generator = warp_stream_adapter.stream_to_warp_blocks(
+        response_generator
+    )
+    
+    return {
+        "streaming": True,
+        "generator": warp_blocks_generator,
+        "context": WarpContextExtractor.serializable_context(warp_context)
+    }
+
+
+async def _ask_warp_completion(
+    bot: str,
+    messages: List[Dict[str, Any]],
+    warp_context: Dict[str, Any],
+    priority: int,
+    execute_actions: bool,
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    start_ns: int,
+) -> Dict[str, Any]:
+    """Non-streaming branch of ask_poe_with_warp_context."""
+    response = await with_rate_limit(
+        openai_client.chat_completion,
+        model=bot,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=False,
+        priority=priority
+    )
+    
+    # Extract response text
+    response_text = response['choices'][0]['message']['content']
+    
+    # Format for Warp
+    warp_blocks = warp_integration.format_poe_response(response_text)
+    
+    # Execute actions if enabled
+    action_results = []
+    commands = files = 0
+    if execute_actions:
+        action_results = await WarpActionExecutor.parse_and_execute_actions(
+            response_text,
+            warp_context
+        )
+        for result in action_results:
+            if result.get('command'):
+                commands += 1
+            if result.get('filepath'):
+                files += 1
+    
+    # Update metrics
+    latency_ns = time.monotonic_ns() - start_ns
+    usage = response.get('usage')
+    metrics.record_success(
+        latency_ns,
+        tokens=usage.get('total_tokens', 0) if usage else 0,
+        commands=commands,
+        files=files,
+    )
+    
+    return {
+        "blocks": warp_blocks,
+        "context": WarpContextExtractor.serializable_context(warp_context),
+        "actions": action_results,
+        "usage": usage or {},
+        "latency": latency_ns / 1e9,
+    }
+
+
 @mcp.tool()
 async def ask_poe_with_warp_context(
     bot: str,
@@ -113,100 +260,44 @@ async def ask_poe_with_warp_context(
     Returns:
         Warp-formatted response with blocks
     """
-    start_time = time.time()
-    metrics['total_requests'] += 1
+    start_ns = time.monotonic_ns()
+    metrics.total_requests += 1
     
     try:
         # Extract Warp context
         warp_context = WarpContextExtractor.extract_from_request(context)
-        metrics['warp_contexts_processed'] += 1
+        metrics.warp_contexts_processed += 1
         
         # Build enhanced prompt with context
         enhanced_prompt = _build_contextual_prompt(prompt, warp_context)
         
-        # Prepare messages
-        messages = [{"role": "user", "content": enhanced_prompt}]
-        
-        # Add git context if available
-        if warp_context.get('git', {}).get('branch'):
-            messages.insert(0, {
-                "role": "system",
-                "content": f"Working in git branch: {warp_context['git']['branch']}"
-            })
+        # Prepare messages, led by the git context if available
+        user_message = {"role": "user", "content": enhanced_prompt}
+        branch = warp_context.get('git', {}).get('branch')
+        if branch:
+            messages = [_branch_system_message(branch), user_message]
+        else:
+            messages = [user_message]
         
         # Query POE with rate limiting
+        request = dict(
+            bot=bot,
+            messages=messages,
+            warp_context=warp_context,
+            priority=priority,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
         if stream:
-            # Streaming response
-            response_generator = await with_rate_limit(
-                openai_client.chat_completion,
-                model=bot,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                stream=True,
-                priority=priority
-            )
-            
-            # Convert to Warp blocks
-            warp_blocks_generator = warp_stream_adapter.stream_to_warp_blocks(
-                response_generator
-            )
-            
-            return {
-                "streaming": True,
-                "generator": warp_blocks_generator,
-                "context": warp_context
-            }
-        else:
-            # Non-streaming response
-            response = await with_rate_limit(
-                openai_client.chat_completion,
-                model=bot,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                stream=False,
-                priority=priority
-            )
-            
-            # Extract response text
-            response_text = response['choices'][0]['message']['content']
-            
-            # Format for Warp
-            warp_blocks = warp_integration.format_poe_response(response_text)
-            
-            # Execute actions if enabled
-            action_results = []
-            if execute_actions:
-                action_results = await WarpActionExecutor.parse_and_execute_actions(
-                    response_text,
-                    warp_context
-                )
-                metrics['commands_executed'] += sum(
-                    1 for r in action_results if r.get('command')
-                )
-                metrics['files_created'] += sum(
-                    1 for r in action_results if r.get('filepath')
-                )
-            
-            # Update metrics
-            latency = time.time() - start_time
-            metrics['total_latency'] += latency
-            metrics['successful_requests'] += 1
-            
-            if response.get('usage'):
-                metrics['total_tokens'] += response['usage'].get('total_tokens', 0)
-            
-            return {
-                "blocks": warp_blocks,
-                "context": warp_context,
-                "actions": action_results,
-                "usage": response.get('usage', {}),
-                "latency": latency,
-            }
+            return await _ask_warp_stream(**request)
+        return await _ask_warp_completion(
+            **request,
+            execute_actions=execute_actions,
+            start_ns=start_ns,
+        )
             
     except Exception as e:
-        metrics['failed_requests'] += 1
+        metrics.failed_requests += 1
         logger.error(f"Warp context query failed: {e}")
         
         # Return error block
@@ -234,6 +325,10 @@ async def stream_poe_to_warp(
     """
     Stream POE response directly to Warp with SSE.
     
+    The rate limiter is entered once, around the chat_completion call that
+    opens the stream; chunks are then drained from the returned generator
+    without touching the limiter again.
+    
     Args:
         bot: Model name
         prompt: User prompt
@@ -243,7 +338,7 @@ async def stream_poe_to_warp(
         temperature: Sampling temperature
         
     Returns:
-        SSE stream generator
+        SSE stream generator yielding encoded (bytes) frames
     """
     try:
         # Extract context
@@ -263,13 +358,14 @@ async def stream_poe_to_warp(
             priority=priority
         )
         
-        # Convert to SSE
+        # Convert to SSE; streaming support loads on first use
+        from poe_client.streaming import sse_streamer
         sse_generator = sse_streamer.stream_response(response_generator)
         
         return {
             "type": "sse_stream",
             "generator": sse_generator,
-            "context": warp_context
+            "context": WarpContextExtractor.serializable_context(warp_context)
         }
         
     except Exception as e:
@@ -301,14 +397,14 @@ async def execute_warp_action(
             payload['command'],
             cwd=warp_context.get('cwd')
         )
-        metrics['commands_executed'] += 1
+        metrics.commands_executed += 1
         
     elif action_type == "file":
         result = await WarpActionExecutor.create_file(
             payload['filepath'],
             payload['content']
         )
-        metrics['files_created'] += 1
+        metrics.files_created += 1
         
     else:
         result = {"error": f"Unknown action type: {action_type}"}
@@ -333,20 +429,20 @@ async def health_check() -> Dict[str, Any]:
     
     Returns comprehensive health status and metrics.
     """
-    uptime = time.time() - metrics['start_time']
+    uptime = time.time() - metrics.start_time
     
     # Get rate limiter metrics
     rate_limit_metrics = rate_limiter.get_metrics()
     
     # Calculate averages
-    avg_latency = (
-        metrics['total_latency'] / metrics['successful_requests']
-        if metrics['successful_requests'] > 0 else 0
+    avg_latency_ms = (
+        metrics.total_latency_ns / metrics.successful_requests / 1e6
+        if metrics.successful_requests > 0 else 0
     )
     
     success_rate = (
-        metrics['successful_requests'] / metrics['total_requests'] * 100
-        if metrics['total_requests'] > 0 else 100
+        metrics.successful_requests / metrics.total_requests * 100
+        if metrics.total_requests > 0 else 100
     )
     
     health_status = {
@@ -355,31 +451,27 @@ async def health_check() -> Dict[str, Any]:
         "uptime_formatted": _format_uptime(uptime),
         "metrics": {
             "requests": {
-                "total": metrics['total_requests'],
-                "successful": metrics['successful_requests'],
-                "failed": metrics['failed_requests'],
+                "total": metrics.total_requests,
+                "successful": metrics.successful_requests,
+                "failed": metrics.failed_requests,
                 "success_rate": f"{success_rate:.2f}%",
             },
             "performance": {
-                "average_latency_ms": avg_latency * 1000,
-                "total_tokens": metrics['total_tokens'],
+                "average_latency_ms": avg_latency_ms,
+                "total_tokens": metrics.total_tokens,
                 "tokens_per_request": (
-                    metrics['total_tokens'] / metrics['successful_requests']
-                    if metrics['successful_requests'] > 0 else 0
+                    metrics.total_tokens / metrics.successful_requests
+                    if metrics.successful_requests > 0 else 0
                 ),
             },
             "warp_integration": {
-                "contexts_processed": metrics['warp_contexts_processed'],
-                "commands_executed": metrics['commands_executed'],
-                "files_created": metrics['files_created'],
+                "contexts_processed": metrics.warp_contexts_processed,
+                "commands_executed": metrics.commands_executed,
+                "files_created": metrics.files_created,
             },
             "rate_limiting": rate_limit_metrics,
         },
-        "configuration": {
-            "debug_mode": config.debug_mode,
-            "session_expiry_minutes": config.session_expiry_minutes,
-            "rate_limit_rpm": 500,
-        },
+        "configuration": _HEALTH_CONFIGURATION,
     }
     
     # Check for issues
@@ -399,7 +491,7 @@ async def health_check() -> Dict[str, Any]:
 async def get_metrics() -> Dict[str, Any]:
     """Get detailed metrics."""
     return {
-        **metrics,
+        **metrics.as_dict(),
         "rate_limiter": rate_limiter.get_metrics(),
         "timestamp": time.time(),
     }
@@ -408,40 +500,82 @@ async def get_metrics() -> Dict[str, Any]:
 @mcp.tool()
 async def reset_metrics() -> Dict[str, str]:
     """Reset metrics counters."""
-    global metrics
-    metrics = {
-        'start_time': time.time(),
-        'total_requests': 0,
-        'successful_requests': 0,
-        'failed_requests': 0,
-        'total_latency': 0.0,
-        'total_tokens': 0,
-        'warp_contexts_processed': 0,
-        'commands_executed': 0,
-        'files_created': 0,
-    }
+    metrics.reset()
     rate_limiter.reset_metrics()
     return {"status": "Metrics reset successfully"}
 
 
+@functools.lru_cache(maxsize=64)
+def _branch_system_message(branch: str) -> Mapping[str, str]:
+    """
+    Build the read-only system message naming the current git branch.
+    
+    Args:
+        branch: Git branch name from the Warp context
+        
+    Returns:
+        System message shared by every request on that branch
+    """
+    return MappingProxyType({
+        "role": "system",
+        "content": f"Working in git branch: {branch}",
+    })
+
+
+# Warp context keys that contribute to the contextual prompt
+_PROMPT_CONTEXT_KEYS = ('blocks', 'selection', 'references')
+
+# Contextual prompts keyed by (prompt, context fingerprint); bursts of
+# prompts against the same Warp context skip re-extraction
+_contextual_prompt_cache: LRUCache = LRUCache(maxsize=512)
+
+
+def _context_fingerprint(context: Dict[str, Any]) -> bytes:
+    """Hash the parts of a Warp context that the contextual prompt uses."""
+    relevant = {key: context.get(key) for key in _PROMPT_CONTEXT_KEYS}
+    return hashlib.blake2b(
+        orjson.dumps(relevant, option=orjson.OPT_SORT_KEYS),
+        digest_size=16,
+    ).digest()
+
+
 def _build_contextual_prompt(prompt: str, context: Dict[str, Any]) -> str:
-    """Build enhanced prompt with Warp context."""
-    parts = [prompt]
+    """Build enhanced prompt with Warp context, reusing cached results."""
+    if context.get('no_cache'):
+        return _render_contextual_prompt(prompt, context)
+    
+    try:
+        key = (prompt, _context_fingerprint(context))
+    except TypeError:
+        # Context holds values orjson can't serialize; build it uncached
+        return _render_contextual_prompt(prompt, context)
     
-    # Add terminal output if available
-    terminal_output = WarpContextExtractor.extract_terminal_output(
-        context.get('blocks', [])
+    enhanced_prompt = _contextual_prompt_cache.get(key)
+    if enhanced_prompt is None:
+        enhanced_prompt = _render_contextual_prompt(prompt, context)
+        _contextual_prompt_cache[key] = enhanced_prompt
+    return enhanced_prompt
+
+
+# Fenced context section appended to a contextual prompt
+_FENCED_SECTION = "\n\n{}:\n```\n{}\n```"
+
+
+def _render_contextual_prompt(prompt: str, context: Dict[str, Any]) -> str:
+    """Build enhanced prompt with Warp context."""
+    terminal_output, selected, files = WarpContextExtractor.extract_all(
+        context, max_terminal_chars=1000
     )
-    if terminal_output:
-        parts.append(f"\n\nTerminal output:\n```\n{terminal_output[:1000]}\n```")
     
-    # Add selected text
-    selected = WarpContextExtractor.extract_selected_text(context)
-    if selected:
-        parts.append(f"\n\nSelected text:\n```\n{selected}\n```")
+    # Add terminal output and selected text as fenced sections
+    parts = [prompt]
+    parts.extend(
+        _FENCED_SECTION.format(label, body)
+        for label, body in (("Terminal output", terminal_output), ("Selected text", selected))
+        if body
+    )
     
     # Add file references
-    files = WarpContextExtractor.extract_file_references(context)
     if files:
         parts.append(f"\n\nReferenced files: {', '.join(files)}")
     
@@ -450,9 +584,9 @@ def _build_contextual_prompt(prompt: str, context: Dict[str, Any]) -> str:
 
 def _format_uptime(seconds: float) -> str:
     """Format uptime in human-readable format."""
-    days = int(seconds // 86400)
-    hours = int((seconds % 86400) // 3600)
-    minutes = int((seconds % 3600) // 60)
+    days, remainder = divmod(int(seconds), 86400)
+    hours, remainder = divmod(remainder, 3600)
+    minutes = remainder // 60
     
     parts = []
     if days > 0:
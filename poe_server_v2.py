@@ -8,6 +8,7 @@ and sharing files. This implementation follows the structure of the official Pyt
 import os
 import asyncio
 import tempfile
+from contextlib import suppress
 from typing import Dict, List, Optional, AsyncGenerator, Any, Union
 from pydantic import BaseModel, Field
 
@@ -29,6 +30,8 @@ from utils import (
     PoeApiError,
     FileHandlingError,
     handle_exception,
+    make_progress_handler,
+    cleanup_sessions_task,
 )
 
 from poe_client import (
@@ -57,7 +60,43 @@ poe_client = PoeClient(
     debug_mode=config.debug_mode,
     claude_compatible=config.claude_compatible,
 )
-session_manager = SessionManager(expiry_minutes=config.session_expiry_minutes)
+session_manager = SessionManager(
+    expiry_minutes=config.session_expiry_minutes,
+    max_sessions=config.max_sessions,
+)
+
+
+# Stream handler for the Poe client, or None when progress isn't supported
+_progress_handler = make_progress_handler(mcp)
+
+# Minimum seconds between progress reports sent through the MCP context
+PROGRESS_REPORT_INTERVAL = 0.1
+
+
+def _throttled_progress_handler(report_progress):
+    """
+    Build a stream handler that reports progress at most once per interval.
+    
+    Streams deliver one chunk per token, so reporting on every chunk would
+    flush a progress notification to the client for each token.
+    
+    Args:
+        report_progress: The request context's report_progress coroutine
+        
+    Returns:
+        A stream handler for the Poe client
+    """
+    loop = asyncio.get_running_loop()
+    last_report = -PROGRESS_REPORT_INTERVAL
+    
+    async def stream_handler(text: str):
+        nonlocal last_report
+        now = loop.time()
+        if now - last_report >= PROGRESS_REPORT_INTERVAL:
+            last_report = now
+            await report_progress(50)  # Report 50% progress
+    
+    return stream_handler
 
 
 # Define models for the MCP tools
@@ -145,14 +184,14 @@ async def ask_poe(
         # Get messages from session
         messages = session_manager.get_messages(current_session_id)
         
-        # Define stream handler for progress updates
-        async def stream_handler(text: str):
-            if context and hasattr(context, "report_progress"):
-                # Use the context to report progress if available
-                await context.report_progress(50)  # Report 50% progress
-            elif hasattr(mcp, "yield_progress"):
-                # Fall back to yield_progress if context is not available
-                await mcp.yield_progress({"text": text})
+        # Define stream handler for progress updates, resolved once per call
+        report_progress = getattr(context, "report_progress", None) if context else None
+        if report_progress is not None:
+            # Use the context to report progress if available
+            stream_handler = _throttled_progress_handler(report_progress)
+        else:
+            # Fall back to yield_progress if context is not available
+            stream_handler = _progress_handler
         
         # Query the Poe model
         response = await poe_client.query_model(
@@ -216,8 +255,10 @@ async def ask_with_attachment(
         Response from the bot and session information
     """
     try:
-        # Validate file
-        validate_file(attachment_path, max_size_mb=config.max_file_size_mb)
+        # Validate file without blocking the event loop on stat calls
+        await asyncio.get_running_loop().run_in_executor(
+            None, validate_file, attachment_path, config.max_file_size_mb
+        )
         
         # Get or create session
         current_session_id = session_manager.get_or_create_session(session_id)
@@ -225,14 +266,14 @@ async def ask_with_attachment(
         # Get messages from session
         messages = session_manager.get_messages(current_session_id)
         
-        # Define stream handler for progress updates
-        async def stream_handler(text: str):
-            if context and hasattr(context, "report_progress"):
-                # Use the context to report progress if available
-                await context.report_progress(50)  # Report 50% progress
-            elif hasattr(mcp, "yield_progress"):
-                # Fall back to yield_progress if context is not available
-                await mcp.yield_progress({"text": text})
+        # Define stream handler for progress updates, resolved once per call
+        report_progress = getattr(context, "report_progress", None) if context else None
+        if report_progress is not None:
+            # Use the context to report progress if available
+            stream_handler = _throttled_progress_handler(report_progress)
+        else:
+            # Fall back to yield_progress if context is not available
+            stream_handler = _progress_handler
         
         # Query the Poe model with the file
         response = await poe_client.query_model_with_file(
@@ -378,24 +419,8 @@ def get_server_info(
         }
 
 
-# Periodic task to clean up expired sessions
-async def cleanup_sessions_task():
-    """Periodically clean up expired sessions."""
-    while True:
-        try:
-            # Clean up expired sessions
-            num_cleaned = session_manager.cleanup_expired_sessions()
-            
-            if num_cleaned > 0:
-                logger.info(f"Cleaned up {num_cleaned} expired sessions")
-            
-            # Sleep for 15 minutes
-            await asyncio.sleep(15 * 60)
-        
-        except Exception as e:
-            logger.error(f"Error in cleanup_sessions_task: {str(e)}")
-            # Sleep for 1 minute before retrying
-            await asyncio.sleep(60)
+# Handle to the cleanup task; the event loop only keeps a weak reference
+_cleanup_task: Optional[asyncio.Task] = None
 
 
 # Start the cleanup task when the server starts
@@ -406,7 +431,19 @@ async def startup():
     logger.info(f"Claude compatibility mode: {config.claude_compatible}")
     
     # Start the session cleanup task
-    asyncio.create_task(cleanup_sessions_task())
+    global _cleanup_task
+    _cleanup_task = asyncio.create_task(cleanup_sessions_task(session_manager))
+
+
+@mcp.on_shutdown
+async def shutdown():
+    """Stop background tasks and release shared resources when the server stops."""
+    if _cleanup_task is not None:
+        _cleanup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _cleanup_task
+    
+    await poe_client.close()
 
 
 def main():
@@ -7,33 +7,64 @@ which allows it to be used with web clients.
 """
 import os
 import sys
-import importlib.util
-import argparse
-from fastmcp.transports.sse import run_sse
 
-# Get the path to the poe_server.py file
-server_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'poe_server.py'))
+# Make sure poe_server.py next to this script is importable
+server_dir = os.path.dirname(os.path.abspath(__file__))
+if server_dir not in sys.path:
+    sys.path.insert(0, server_dir)
 
-# Import the poe_server module
-spec = importlib.util.spec_from_file_location("poe_server", server_path)
-poe_server = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(poe_server)
+
+# Defaults used when no host or port is given
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8000
+
+
+def parse_args(argv):
+    """
+    Parse the command line into a host and port.
+    
+    The common invocations (no arguments, or just a port) are handled
+    directly; argparse is only imported for --host, --help and errors.
+    
+    Args:
+        argv: Command line arguments, without the program name
+        
+    Returns:
+        Tuple of (host, port)
+    """
+    if not argv:
+        return DEFAULT_HOST, DEFAULT_PORT
+    if len(argv) == 1 and argv[0].isdigit():
+        return DEFAULT_HOST, int(argv[0])
+    
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run the Poe Proxy MCP server with SSE transport")
+    parser.add_argument("port", nargs="?", type=int, default=DEFAULT_PORT, help="Port to run the server on (default: 8000)")
+    parser.add_argument("--host", type=str, default=DEFAULT_HOST, help="Host to bind to (default: 0.0.0.0)")
+    args = parser.parse_args(argv)
+    
+    return args.host, args.port
 
 
 def main():
     """Entry point for the console script."""
     # Parse command line arguments
-    parser = argparse.ArgumentParser(description="Run the Poe Proxy MCP server with SSE transport")
-    parser.add_argument("port", nargs="?", type=int, default=8000, help="Port to run the server on (default: 8000)")
-    parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to bind to (default: 0.0.0.0)")
-    args = parser.parse_args()
+    host, port = parse_args(sys.argv[1:])
+    
+    # The server and transport are imported only once we know we're running,
+    # so --help and argument errors return without loading FastMCP
+    from fastmcp.transports.sse import run_sse
+    import poe_server
+    from utils import install_uvloop
     
-    print(f"Starting Poe Proxy MCP server with SSE transport on {args.host}:{args.port}")
-    print(f"Access the server at http://{args.host if args.host != '0.0.0.0' else 'localhost'}:{args.port}")
+    print(f"Starting Poe Proxy MCP server with SSE transport on {host}:{port}")
+    print(f"Access the server at http://{host if host != '0.0.0.0' else 'localhost'}:{port}")
     print("Press Ctrl+C to stop the server")
     
-    # Run the server with SSE transport
-    run_sse(poe_server.mcp, host=args.host, port=args.port)
+    # Run the server with SSE transport, on uvloop where available
+    install_uvloop()
+    run_sse(poe_server.mcp, host=host, port=port)
 
 
 if __name__ == "__main__":
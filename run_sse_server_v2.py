@@ -11,43 +11,58 @@ import sys
 import asyncio
 from typing import Dict, List, Optional, AsyncGenerator, Any, Union
 
-# Import from the official MCP SDK
-try:
-    from mcp.server.fastmcp import FastMCP
-    from mcp.shared.context import RequestContext
-except ImportError:
-    raise ImportError(
-        "The mcp package is not installed. Please install it with: pip install mcp"
-    )
-
-# Import our core implementation
-from poe_server_v2 import (
-    ask_poe,
-    ask_with_attachment,
-    clear_session,
-    list_available_models,
-    get_server_info,
-    startup,
-    logger,
-    config,
-)
-
-# Create FastMCP server
-mcp = FastMCP("Poe Proxy MCP SSE Server")
-
-# Register tools
-mcp.register_tool(ask_poe)
-mcp.register_tool(ask_with_attachment)
-mcp.register_tool(clear_session)
-mcp.register_tool(list_available_models)
-mcp.register_tool(get_server_info)
 
-# Register startup handler
-mcp.on_startup(startup)
+def create_server():
+    """
+    Build the SSE server around the tools from poe_server_v2.
+    
+    The MCP SDK and the server module are imported here rather than at module
+    level, so importing this script stays cheap until the server is started.
+    
+    Returns:
+        The configured FastMCP server
+    """
+    # Import from the official MCP SDK
+    try:
+        from mcp.server.fastmcp import FastMCP
+    except ImportError:
+        raise ImportError(
+            "The mcp package is not installed. Please install it with: pip install mcp"
+        )
+    
+    # Import our core implementation
+    from poe_server_v2 import (
+        ask_poe,
+        ask_with_attachment,
+        clear_session,
+        list_available_models,
+        get_server_info,
+        startup,
+    )
+    
+    # Create FastMCP server
+    mcp = FastMCP("Poe Proxy MCP SSE Server")
+    
+    # Register tools
+    mcp.register_tool(ask_poe)
+    mcp.register_tool(ask_with_attachment)
+    mcp.register_tool(clear_session)
+    mcp.register_tool(list_available_models)
+    mcp.register_tool(get_server_info)
+    
+    # Register startup handler
+    mcp.on_startup(startup)
+    
+    return mcp
 
 
 def main():
     """Entry point for the console script."""
+    import uvicorn
+    from poe_server_v2 import logger, config
+    
+    mcp = create_server()
+    
     # Get port from command line arguments or use default
     port = 8000
     if len(sys.argv) > 1:
@@ -56,11 +71,23 @@ def main():
         except ValueError:
             logger.error(f"Invalid port: {sys.argv[1]}, using default port: {port}")
     
-    logger.info(f"Starting Poe Proxy MCP SSE Server on port {port}")
+    host = mcp.settings.host
+    
+    logger.info(f"Starting Poe Proxy MCP SSE Server on {host}:{port}")
     logger.info(f"Claude compatibility mode: {config.claude_compatible}")
     
-    # Run the MCP server with SSE transport
-    mcp.run(transport="sse", port=port)
+    # Serve the SSE app with uvicorn directly. With uvicorn[standard] installed,
+    # "auto" picks uvloop and the httptools parser, falling back to asyncio and
+    # h11 otherwise. A single worker is kept on purpose: SSE sessions live in
+    # this process, so a client's message posts must reach the same worker
+    server_config = uvicorn.Config(
+        mcp.sse_app(),
+        host=host,
+        port=port,
+        loop="auto",
+        http="auto",
+    )
+    uvicorn.Server(server_config).run()
 
 
 if __name__ == "__main__":
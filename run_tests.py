@@ -6,6 +6,7 @@ This script discovers and runs all tests in the tests directory.
 """
 import os
 import sys
+import json
 import unittest
 import argparse
 from dotenv import load_dotenv
@@ -18,27 +19,68 @@ if not os.environ.get("POE_API_KEY"):
     print("Warning: POE_API_KEY environment variable is not set.")
     print("Some tests may fail. Set this in your .env file.")
 
-def run_tests(pattern=None, verbose=False):
+# Project root, used as the top-level directory for test discovery
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# IDs of the tests that failed in the last run, for --failed-only
+FAILED_TESTS_FILE = os.path.join(ROOT_DIR, ".test_failures.json")
+
+
+def load_failed_tests():
+    """
+    Load the IDs of the tests that failed in the last run.
+    
+    Returns:
+        List of test IDs, empty if there is no record of failures
+    """
+    try:
+        with open(FAILED_TESTS_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_failed_tests(result):
+    """
+    Record the IDs of the tests that failed or errored in a run.
+    
+    Args:
+        result: The unittest result of the run
+    """
+    failed = [test.id() for test, _ in result.failures + result.errors]
+    
+    with open(FAILED_TESTS_FILE, "w", encoding="utf-8") as f:
+        json.dump(failed, f)
+
+
+def run_tests(pattern=None, verbose=False, failed_only=False):
     """
     Run tests with the given pattern.
     
     Args:
         pattern: Pattern to match test files (default: test_*.py)
         verbose: Whether to show verbose output
+        failed_only: Only rerun the tests that failed in the last run
     """
     # Add the parent directory to the path so tests can import modules
-    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, ROOT_DIR)
     
-    # Discover and run tests
     loader = unittest.TestLoader()
+    failed_tests = load_failed_tests() if failed_only else []
     
-    if pattern:
-        suite = loader.discover("tests", pattern=pattern)
+    if failed_tests:
+        # Load the recorded tests by name instead of walking the tree
+        suite = loader.loadTestsFromNames(failed_tests)
     else:
-        suite = loader.discover("tests", pattern="test_*.py")
+        suite = loader.discover(
+            os.path.join(ROOT_DIR, "tests"),
+            pattern=pattern or "test_*.py",
+            top_level_dir=ROOT_DIR,
+        )
     
     runner = unittest.TextTestRunner(verbosity=2 if verbose else 1)
     result = runner.run(suite)
+    save_failed_tests(result)
     
     return result.wasSuccessful()
 
@@ -46,9 +88,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run tests for the Poe Proxy MCP server")
     parser.add_argument("--pattern", help="Pattern to match test files (default: test_*.py)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Show verbose output")
+    parser.add_argument("--failed-only", action="store_true",
+                        help="Only rerun the tests that failed in the last run")
     
     args = parser.parse_args()
     
-    success = run_tests(args.pattern, args.verbose)
+    success = run_tests(args.pattern, args.verbose, args.failed_only)
     
     sys.exit(0 if success else 1)
\ No newline at end of file
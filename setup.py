@@ -20,6 +20,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/Anansitrading/poe-proxy-mcp",
     packages=find_packages(),
+    py_modules=["poe_server", "run_sse_server"],
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -29,12 +30,15 @@ setup(
     install_requires=[
         "fastmcp>=0.2.0",
         "fastapi-poe>=0.0.16",
-        "httpx>=0.24.1",
+        "httpx[http2]>=0.24.1",
         "python-dotenv>=1.0.0",
         "pydantic>=2.0.0",
         "loguru>=0.7.0",
-        "uvicorn>=0.22.0",
+        "uvicorn[standard]>=0.22.0",
         "python-multipart>=0.0.6",
+        "orjson>=3.8.0",
+        "cachetools>=5.0.0",
+        "uvloop>=0.17.0; sys_platform != 'win32'",
     ],
     entry_points={
         "console_scripts": [
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for Warp contextual prompt building.
+
+This script tests that contextual prompts are cached per prompt and
+context, and that requests marked no_cache bypass the cache.
+"""
+import os
+import sys
+import unittest
+
+# Add parent directory to path to import server modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from warp_context_handler import WarpContextExtractor
+from poe_server_phase2 import _build_contextual_prompt, _contextual_prompt_cache
+
+
+class TestContextualPrompt(unittest.TestCase):
+    """Test cases for the contextual prompt cache."""
+
+    def setUp(self):
+        """Start every test with an empty prompt cache."""
+        _contextual_prompt_cache.clear()
+        self.request_context = {
+            'blocks': [{'text': 'ls\nREADME.md', 'type': 'output'}],
+            'selection': 'README.md',
+            'cwd': '/tmp',
+            'git': {},
+            'env': {},
+        }
+
+    def test_prompt_is_cached(self):
+        """Test that a built prompt is stored for reuse."""
+        context = WarpContextExtractor.extract_from_request(self.request_context)
+        prompt = _build_contextual_prompt("What is here?", context)
+        
+        self.assertIn("README.md", prompt)
+        self.assertEqual(len(_contextual_prompt_cache), 1)
+
+    def test_no_cache_request_bypasses_cache(self):
+        """Test that a request marked no_cache is built without caching."""
+        self.request_context['no_cache'] = True
+        context = WarpContextExtractor.extract_from_request(self.request_context)
+        prompt = _build_contextual_prompt("What is here?", context)
+        
+        self.assertIn("README.md", prompt)
+        self.assertEqual(len(_contextual_prompt_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,9 +12,12 @@ This script tests the new OpenAI client implementation including:
 import os
 import sys
 import asyncio
+import functools
 import json
 from pathlib import Path
 
+import httpx
+
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -25,18 +28,32 @@ from poe_client.openai_client import (
     EXAMPLE_TOOL_DEFINITIONS,
 )
 from utils.config import get_config
+from utils import install_uvloop
+
+
+# Configuration is read once per run and shared by the script and the tests
+_get_config = functools.lru_cache(maxsize=None)(get_config)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_shared_client() -> PoeOpenAIClient:
+    """Client shared by the tests, so they reuse one connection pool."""
+    config = _get_config()
+    return PoeOpenAIClient(
+        api_key=config.poe_api_key,
+        async_mode=True,
+        debug_mode=True,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
+        ),
+    )
 
 
 async def test_basic_completion():
     """Test basic chat completion."""
     print("\n=== Testing Basic Completion ===")
     
-    config = get_config()
-    client = PoeOpenAIClient(
-        api_key=config.poe_api_key,
-        async_mode=True,
-        debug_mode=True
-    )
+    client = _get_shared_client()
     
     response = await client.chat_completion(
         model="Claude-Sonnet-4",
@@ -59,12 +76,7 @@ async def test_function_calling():
     """Test function calling."""
     print("\n=== Testing Function Calling ===")
     
-    config = get_config()
-    client = PoeOpenAIClient(
-        api_key=config.poe_api_key,
-        async_mode=True,
-        debug_mode=True
-    )
+    client = _get_shared_client()
     
     # Register tools
     client.register_tool("get_weather", example_get_weather)
@@ -91,12 +103,7 @@ async def test_streaming():
     """Test streaming response."""
     print("\n=== Testing Streaming ===")
     
-    config = get_config()
-    client = PoeOpenAIClient(
-        api_key=config.poe_api_key,
-        async_mode=True,
-        debug_mode=True
-    )
+    client = _get_shared_client()
     
     stream = await client.chat_completion(
         model="Claude-Sonnet-4",
@@ -107,27 +114,22 @@ async def test_streaming():
     )
     
     print("Streaming response:")
-    full_response = ""
+    chunks = []
     async for chunk in stream:
         if chunk['choices'][0]['delta'].get('content'):
             content = chunk['choices'][0]['delta']['content']
             print(content, end='', flush=True)
-            full_response += content
+            chunks.append(content)
     
     print("\n")
-    return full_response
+    return "".join(chunks)
 
 
 async def test_advanced_parameters():
     """Test advanced parameters."""
     print("\n=== Testing Advanced Parameters ===")
     
-    config = get_config()
-    client = PoeOpenAIClient(
-        api_key=config.poe_api_key,
-        async_mode=True,
-        debug_mode=True
-    )
+    client = _get_shared_client()
     
     # Test with high temperature for creativity
     response1 = await client.chat_completion(
@@ -186,12 +188,7 @@ async def test_multi_modal():
     """Test multi-modal generation (image/video)."""
     print("\n=== Testing Multi-Modal Generation ===")
     
-    config = get_config()
-    client = PoeOpenAIClient(
-        api_key=config.poe_api_key,
-        async_mode=True,
-        debug_mode=True
-    )
+    client = _get_shared_client()
     
     # Test image generation
     print("Testing image generation...")
@@ -226,14 +223,23 @@ async def run_all_tests():
         ("Multi-Modal", test_multi_modal),
     ]
     
+    # The tests are independent network round-trips, so run them concurrently
+    try:
+        outcomes = await asyncio.gather(
+            *(test_func() for _, test_func in tests),
+            return_exceptions=True
+        )
+    finally:
+        if _get_shared_client.cache_info().currsize:
+            await _get_shared_client().close()
+    
     results = {}
-    for name, test_func in tests:
-        try:
-            result = await test_func()
+    for (name, _), outcome in zip(tests, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"\n❌ Test failed: {outcome}")
+            results[name] = f"❌ FAILED: {str(outcome)}"
+        else:
             results[name] = "✅ PASSED"
-        except Exception as e:
-            print(f"\n❌ Test failed: {e}")
-            results[name] = f"❌ FAILED: {str(e)}"
     
     print("\n" + "=" * 50)
     print("Test Results Summary")
@@ -246,10 +252,11 @@ async def run_all_tests():
 
 if __name__ == "__main__":
     # Check for API key
-    config = get_config()
+    config = _get_config()
     if not config.poe_api_key:
         print("Error: POE_API_KEY not set in environment or .env file")
         sys.exit(1)
     
-    # Run tests
+    # Run tests, on uvloop where available
+    install_uvloop()
     asyncio.run(run_all_tests())
\ No newline at end of file
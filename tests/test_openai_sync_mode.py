@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for the OpenAI client in sync mode.
+
+This script tests that a blocking SDK call, such as one sleeping through a
+429 retry backoff, doesn't hold up concurrent requests on the event loop.
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+
+from openai.types.chat import ChatCompletion
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poe_client.openai_client import PoeOpenAIClient
+
+# Seconds the first request spends in the SDK's retry backoff
+BACKOFF_DELAY = 0.5
+
+
+def _completion(text):
+    """Build a minimal chat completion response."""
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-bot",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": text},
+        }],
+    })
+
+
+class TestSyncModeBackoff(unittest.TestCase):
+    """Test cases for sync-mode requests waiting on a rate limit."""
+
+    def setUp(self):
+        """Set up a sync client whose first request backs off after a 429."""
+        self.client = PoeOpenAIClient(api_key="test-key", async_mode=False)
+        lock = threading.Lock()
+        calls = []
+        
+        def create(**params):
+            with lock:
+                calls.append(params)
+                first = len(calls) == 1
+            if first:
+                # The sync SDK sleeps between retries after a 429
+                time.sleep(BACKOFF_DELAY)
+            return _completion("ok")
+        
+        self.client.client.chat.completions.create = create
+
+    def tearDown(self):
+        """Close the client's connection pool."""
+        asyncio.run(self.client.close())
+
+    def test_backoff_does_not_block_other_requests(self):
+        """Test that nine requests finish while the first one backs off."""
+        start = time.monotonic()
+        
+        async def timed_request(i):
+            response = await self.client.chat_completion(
+                model="test-bot",
+                messages=[{"role": "user", "content": f"request {i}"}],
+            )
+            self.assertEqual(response["choices"][0]["message"]["content"], "ok")
+            return time.monotonic() - start
+        
+        async def run():
+            return await asyncio.gather(*(timed_request(i) for i in range(10)))
+        
+        # Seconds from the start of the batch until each request finished
+        elapsed = asyncio.run(run())
+        total = time.monotonic() - start
+        
+        self.assertGreaterEqual(max(elapsed), BACKOFF_DELAY)
+        self.assertEqual(
+            sum(1 for seconds in elapsed if seconds < BACKOFF_DELAY / 2), 9
+        )
+        self.assertLess(total, BACKOFF_DELAY * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
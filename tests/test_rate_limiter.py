@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for the POE API rate limiter.
+
+This script tests that concurrent requests waiting on the rate limiter
+back off in parallel rather than serializing behind the limiter's lock.
+"""
+import os
+import sys
+import time
+import asyncio
+import unittest
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poe_client.rate_limiter import ExponentialBackoffRateLimiter
+
+
+class TestExponentialBackoffRateLimiter(unittest.TestCase):
+    """Test cases for the exponential backoff rate limiter."""
+
+    def test_lock_released_while_waiting(self):
+        """Test that a waiting request does not hold the limiter lock."""
+        async def run():
+            limiter = ExponentialBackoffRateLimiter()
+            limiter.retry_after_until = time.time() + 0.5
+            
+            waiter = asyncio.create_task(limiter._wait_for_slot())
+            await asyncio.sleep(0.05)
+            
+            # Another caller can take the lock while the first one sleeps
+            await asyncio.wait_for(limiter.lock.acquire(), timeout=0.1)
+            limiter.lock.release()
+            
+            await waiter
+        
+        asyncio.run(run())
+
+    def test_concurrent_waiters_back_off_in_parallel(self):
+        """Test that concurrent waiters share one retry-after period."""
+        async def run():
+            limiter = ExponentialBackoffRateLimiter()
+            limiter.retry_after_until = time.time() + 0.2
+            
+            start = time.monotonic()
+            await asyncio.gather(*(limiter._wait_for_slot() for _ in range(10)))
+            return time.monotonic() - start
+        
+        elapsed = asyncio.run(run())
+        self.assertLess(elapsed, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for OpenAI client tool execution.
+
+This script tests how registered tools are run and how their results are
+serialized for the model, without contacting the POE API.
+"""
+import os
+import sys
+import json
+import asyncio
+import unittest
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poe_client.openai_client import PoeOpenAIClient, example_calculate
+
+
+class TestExecuteToolCall(unittest.TestCase):
+    """Test cases for executing a single tool call."""
+
+    def setUp(self):
+        """Set up a client that never sends requests."""
+        self.client = PoeOpenAIClient(api_key="test-key", async_mode=True)
+        self.client.register_tool("calculate", example_calculate)
+
+    def tearDown(self):
+        """Close the client's connection pool."""
+        asyncio.run(self.client.close())
+
+    def _call(self, name, arguments):
+        """Run a tool call and return its output string."""
+        tool_call = {
+            "id": "call_1",
+            "function": {"name": name, "arguments": json.dumps(arguments)},
+        }
+        result = asyncio.run(self.client.execute_tool_call(tool_call))
+        self.assertEqual(result["tool_call_id"], "call_1")
+        return result["output"]
+
+    def test_result_is_serialized(self):
+        """Test that a dict result is returned as JSON."""
+        output = self._call("calculate", {"expression": "6 * 7"})
+        self.assertEqual(json.loads(output), {"result": 42})
+
+    def test_big_int_result_is_serialized(self):
+        """Test that integers wider than 64 bits are still serialized."""
+        output = self._call("calculate", {"expression": "2**70"})
+        self.assertEqual(json.loads(output), {"result": 2 ** 70})
+
+    def test_async_tool_is_awaited(self):
+        """Test that a coroutine tool is awaited rather than run in a thread."""
+        async def echo(text):
+            return {"echo": text}
+        
+        self.client.register_tool("echo", echo)
+        output = self._call("echo", {"text": "hi"})
+        self.assertEqual(json.loads(output), {"echo": "hi"})
+
+    def test_unhashable_tool(self):
+        """Test that a callable that can't be hashed still runs."""
+        class Tool(dict):
+            def __call__(self, text):
+                return {"upper": text.upper()}
+        
+        self.client.register_tool("upper", Tool())
+        output = self._call("upper", {"text": "hi"})
+        self.assertEqual(json.loads(output), {"upper": "HI"})
+
+
+if __name__ == "__main__":
+    unittest.main()
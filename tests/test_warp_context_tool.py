@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the Warp context MCP tool.
+
+This script calls ask_poe_with_warp_context through an in-memory FastMCP
+client, with the POE client stubbed out, to check that the tool result can
+be serialized back to the client.
+"""
+import os
+import sys
+import asyncio
+import unittest
+
+from fastmcp import Client
+
+# Add parent directory to path to import server modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import poe_server_phase2
+
+
+async def _fake_chat_completion(**kwargs):
+    """Stand-in for the POE API returning a short plain-text answer."""
+    return {
+        "choices": [{"message": {"content": "hello"}}],
+        "usage": {"total_tokens": 3},
+    }
+
+
+class TestAskPoeWithWarpContext(unittest.TestCase):
+    """Test cases for the ask_poe_with_warp_context tool."""
+
+    def setUp(self):
+        """Stub the POE client so no request leaves the process."""
+        self.openai_client = poe_server_phase2.openai_client
+        self.original_chat_completion = self.openai_client.chat_completion
+        self.openai_client.chat_completion = _fake_chat_completion
+
+    def tearDown(self):
+        """Restore the real POE client method."""
+        self.openai_client.chat_completion = self.original_chat_completion
+
+    def _call_tool(self, context):
+        """Call the tool through a FastMCP client and return its data."""
+        async def run():
+            async with Client(poe_server_phase2.mcp) as client:
+                return await client.call_tool(
+                    "ask_poe_with_warp_context",
+                    {"bot": "test-bot", "prompt": "hi", "context": context},
+                )
+        
+        return asyncio.run(run()).data
+
+    def test_context_without_env(self):
+        """Test that a request without env returns the process env as a dict."""
+        data = self._call_tool({"cwd": "/tmp"})
+        
+        self.assertEqual(data["context"]["cwd"], "/tmp")
+        self.assertEqual(data["context"]["env"], dict(os.environ))
+        self.assertEqual(data["usage"], {"total_tokens": 3})
+
+    def test_context_with_env(self):
+        """Test that a request's own env is returned unchanged."""
+        data = self._call_tool({"cwd": "/tmp", "env": {"TERM": "xterm"}})
+        
+        self.assertEqual(data["context"]["env"], {"TERM": "xterm"})
+
+
+if __name__ == "__main__":
+    unittest.main()
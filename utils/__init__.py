@@ -17,6 +17,14 @@ from .config import (
     PoeProxyConfig,
 )
 
+from .event_loop import install_uvloop
+
+from .mcp_utils import (
+    SESSION_CLEANUP_MIN_INTERVAL,
+    make_progress_handler,
+    cleanup_sessions_task,
+)
+
 __all__ = [
     "setup_logging",
     "logger",
@@ -27,4 +35,8 @@ __all__ = [
     "handle_exception",
     "get_config",
     "PoeProxyConfig",
+    "install_uvloop",
+    "SESSION_CLEANUP_MIN_INTERVAL",
+    "make_progress_handler",
+    "cleanup_sessions_task",
 ]
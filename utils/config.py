@@ -46,6 +46,17 @@ class PoeProxyConfig(BaseModel):
         description="Session expiry time in minutes"
     )
     
+    max_sessions: int = Field(
+        default_factory=lambda: int(os.getenv("MAX_SESSIONS", "1000")),
+        description="Maximum number of in-memory sessions before LRU eviction"
+    )
+    
+    # Concurrency control
+    max_concurrency: int = Field(
+        default_factory=lambda: int(os.getenv("POE_MAX_CONCURRENCY", "32")),
+        description="Maximum number of concurrent OpenAI-compatible requests to Poe"
+    )
+    
     def validate_config(self) -> None:
         """
         Validate the configuration and raise exceptions for invalid values.
@@ -0,0 +1,26 @@
+"""
+Event loop utilities for the Poe Proxy MCP server.
+"""
+import asyncio
+
+from .logging_utils import logger
+
+
+def install_uvloop() -> bool:
+    """
+    Use uvloop for event loops created from now on, if it is available.
+    
+    uvloop is an optional speedup; where it isn't installed (e.g. Windows)
+    the default asyncio loop is kept.
+    
+    Returns:
+        bool: True if the uvloop policy was installed, False otherwise
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.debug("Using uvloop event loop policy")
+    return True
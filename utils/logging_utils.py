@@ -19,12 +19,14 @@ def setup_logging(debug_mode=False):
     # Determine log level based on debug mode
     log_level = "DEBUG" if debug_mode else "INFO"
     
-    # Add stdout handler with appropriate format
+    # Add stdout handler with appropriate format; enqueue hands the write
+    # to loguru's background thread so request handlers don't block on I/O
     logger.add(
         sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         level=log_level,
         colorize=True,
+        enqueue=True,
     )
     
     # Add file handler for error logs
@@ -35,6 +37,7 @@ def setup_logging(debug_mode=False):
         level="ERROR",
         rotation="10 MB",
         retention="1 week",
+        enqueue=True,
     )
     
     logger.info(f"Logging initialized with level: {log_level}")
@@ -0,0 +1,62 @@
+"""
+MCP server helpers shared by the Poe Proxy MCP servers.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from .logging_utils import logger
+
+
+# Minimum seconds between expired-session sweeps
+SESSION_CLEANUP_MIN_INTERVAL = 1
+
+
+def make_progress_handler(mcp: Any) -> Optional[Callable[[str], Awaitable[None]]]:
+    """
+    Build a stream handler that forwards streamed chunks as progress updates.
+    
+    The progress hook is resolved once here rather than on every chunk;
+    older FastMCP versions don't provide it.
+    
+    Args:
+        mcp: The MCP server instance
+        
+    Returns:
+        A stream handler for the Poe client, or None when progress isn't supported
+    """
+    yield_progress = getattr(mcp, "yield_progress", None)
+    if yield_progress is None:
+        return None
+    
+    async def report_progress(text: str):
+        """Forward a streamed chunk to the MCP client as a progress update."""
+        await yield_progress({"text": text})
+    
+    return report_progress
+
+
+# Periodic task to clean up expired sessions
+async def cleanup_sessions_task(session_manager: Any):
+    """
+    Clean up expired sessions as they fall due.
+    
+    Args:
+        session_manager: The server's SessionManager
+    """
+    while True:
+        try:
+            num_cleaned = session_manager.cleanup_expired_sessions()
+            
+            if num_cleaned > 0:
+                logger.info(f"Cleaned up {num_cleaned} expired sessions")
+            
+            # Sleep until the least recently used session is due to expire
+            await asyncio.sleep(max(
+                SESSION_CLEANUP_MIN_INTERVAL,
+                session_manager.seconds_until_next_expiry(),
+            ))
+        
+        except Exception as e:
+            logger.error(f"Error in cleanup_sessions_task: {str(e)}")
+            # Sleep for 1 minute before retrying
+            await asyncio.sleep(60)
@@ -6,9 +6,13 @@ This module extends the POE MCP server with tools that can drive Warp terminal a
 based on responses from POE models.
 """
 import os
-import subprocess
+import re
+import asyncio
+import functools
+import io
+import signal
 import tempfile
-from typing import Dict, List, Optional, Any, Union
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Tuple, Union
 from pathlib import Path
 
 from loguru import logger
@@ -16,6 +20,22 @@ from pydantic import BaseModel, Field
 
 from utils import handle_exception, FileHandlingError
 
+# Action directives recognized in POE responses
+# File creation: ```filename\ncode```
+_FILE_RE = re.compile(r'```(\w+(?:\.\w+)?)\s*\n(.*?)\n```', re.DOTALL)
+# Wording before a code block that asks for it to be saved
+_SAVE_INTENT_RE = re.compile(r"save|create|write|file|here's the|here is the", re.IGNORECASE)
+# Command execution: "run:" or "execute:"
+_CMD_RE = re.compile(r'(?:run|execute):\s*`([^`]+)`', re.IGNORECASE)
+# Opening files: "open file:" or similar
+_OPEN_RE = re.compile(r'open\s+(?:file\s+)?[`"\']([^`"\']+)[`"\']', re.IGNORECASE)
+
+# Default number of actions run at the same time when executing a batch
+DEFAULT_MAX_CONCURRENT_ACTIONS = 4
+
+# Commands rejected by execute_terminal_command
+_DANGEROUS_RE = re.compile(r'\b(?:rm\s+-rf\s+/|sudo\s+rm\b|mkfs|dd\s+if=|format\b)', re.IGNORECASE)
+
 
 class WarpActionResult(BaseModel):
     """Result of a Warp agent action."""
@@ -55,44 +75,49 @@ async def execute_terminal_command(
         logger.debug(f"Executing command: {command}")
         
         # Security check - basic command validation
-        dangerous_commands = ['rm -rf /', 'sudo rm', 'mkfs', 'dd if=', 'format']
-        if any(dangerous in command.lower() for dangerous in dangerous_commands):
+        if _DANGEROUS_RE.search(command):
             return WarpActionResult(
                 success=False,
                 action="execute_command",
                 error="Command rejected for security reasons"
             )
         
-        # Set up process execution
-        process_kwargs = {
-            'shell': True,
-            'timeout': timeout,
-            'cwd': working_directory,
-        }
-        
-        if capture_output:
-            process_kwargs.update({
-                'capture_output': True,
-                'text': True
-            })
+        # Execute the command without blocking the event loop
+        pipe = asyncio.subprocess.PIPE if capture_output else None
+        process = await asyncio.create_subprocess_shell(
+            command,
+            cwd=working_directory,
+            stdout=pipe,
+            stderr=pipe,
+            start_new_session=hasattr(os, "killpg"),
+        )
         
-        # Execute the command
-        result = subprocess.run(command, **process_kwargs)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            # Kill the whole process group so children of the shell don't keep the pipes open
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+            await process.communicate()
+            raise
         
         output = None
         if capture_output:
-            output = result.stdout
-            if result.stderr:
-                output += f"\nSTDERR: {result.stderr}"
+            # Join the raw streams and decode once, instead of copying stdout again
+            if stderr:
+                stdout = b"".join((stdout, b"\nSTDERR: ", stderr))
+            output = stdout.decode(errors="replace")
         
         return WarpActionResult(
-            success=result.returncode == 0,
+            success=process.returncode == 0,
             action="execute_command",
             output=output,
-            error=None if result.returncode == 0 else f"Command failed with exit code {result.returncode}"
+            error=None if process.returncode == 0 else f"Command failed with exit code {process.returncode}"
         )
         
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         return WarpActionResult(
             success=False,
             action="execute_command",
@@ -108,39 +133,37 @@ async def execute_terminal_command(
         )
 
 
-async def create_file_from_response(
+def _create_file_sync(
     file_path: str,
     content: str,
     overwrite: bool = False
 ) -> WarpActionResult:
-    """
-    Create a file with content provided by POE model response.
-    
-    Args:
-        file_path: Path where to create the file
-        content: Content to write to the file
-        overwrite: Whether to overwrite existing files
-        
-    Returns:
-        WarpActionResult with creation details
-    """
+    """Create a file with content provided by POE model response (blocking)."""
     try:
-        path = Path(file_path)
+        # Let open() do the existence check: O_EXCL fails on an existing file,
+        # so the common case needs no separate stat or mkdir
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if overwrite else os.O_EXCL)
         
-        # Check if file exists and overwrite is False
-        if path.exists() and not overwrite:
+        try:
+            fd = os.open(file_path, flags, 0o644)
+        except FileExistsError:
             return WarpActionResult(
                 success=False,
                 action="create_file",
                 error=f"File {file_path} already exists and overwrite=False"
             )
+        except FileNotFoundError:
+            # Create parent directories if they don't exist
+            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(file_path, flags, 0o644)
         
-        # Create parent directories if they don't exist
-        path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Write the content
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Write the content, encoding once instead of going through a text-mode wrapper
+        try:
+            data = memoryview(content.encode('utf-8'))
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
         
         logger.info(f"Created file: {file_path}")
         
@@ -159,6 +182,30 @@ async def create_file_from_response(
         )
 
 
+async def create_file_from_response(
+    file_path: str,
+    content: str,
+    overwrite: bool = False
+) -> WarpActionResult:
+    """
+    Create a file with content provided by POE model response.
+    
+    Args:
+        file_path: Path where to create the file
+        content: Content to write to the file
+        overwrite: Whether to overwrite existing files
+        
+    Returns:
+        WarpActionResult with creation details
+    """
+    # Disk I/O runs on the default executor so a large write doesn't stall
+    # the event loop and several files can be written at once
+    return await asyncio.get_running_loop().run_in_executor(
+        None,
+        functools.partial(_create_file_sync, file_path, content, overwrite)
+    )
+
+
 async def open_file_in_editor(
     file_path: str,
     editor: str = "code"  # Default to VS Code
@@ -181,15 +228,20 @@ async def open_file_in_editor(
                 error=f"File does not exist: {file_path}"
             )
         
-        # Execute editor command
+        # Execute editor command without blocking the event loop
         command = f"{editor} {file_path}"
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
         
         return WarpActionResult(
-            success=result.returncode == 0,
+            success=process.returncode == 0,
             action="open_file",
             output=f"Opened {file_path} in {editor}",
-            error=None if result.returncode == 0 else result.stderr
+            error=None if process.returncode == 0 else stderr.decode(errors="replace")
         )
         
     except Exception as e:
@@ -201,6 +253,115 @@ async def open_file_in_editor(
         )
 
 
+async def _unknown_action(action: str) -> WarpActionResult:
+    """Result for a batch entry whose action name has no handler."""
+    return WarpActionResult(
+        success=False,
+        action=action,
+        error=f"Unknown action: {action}"
+    )
+
+
+# Action names accepted by batch_execute_actions, mapped to their handlers
+_ACTION_HANDLERS: Dict[str, Callable[..., Awaitable[WarpActionResult]]] = {
+    "execute_command": execute_terminal_command,
+    "create_file": create_file_from_response,
+    "open_file": open_file_in_editor,
+}
+
+
+async def _run_bounded(
+    calls: List[Tuple[str, Callable[[], Awaitable[WarpActionResult]]]],
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT_ACTIONS,
+    stop_on_error: bool = False
+) -> List[WarpActionResult]:
+    """
+    Run action calls concurrently, at most max_concurrent at a time.
+    
+    Args:
+        calls: (action name, zero-argument coroutine factory) pairs
+        max_concurrent: Maximum number of actions running at once
+        stop_on_error: Skip actions that have not started yet once one fails
+        
+    Returns:
+        One WarpActionResult per call, in the order the calls were given
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrent))
+    failed = False
+    
+    async def guarded(action: str, call: Callable[[], Awaitable[WarpActionResult]]) -> WarpActionResult:
+        nonlocal failed
+        async with semaphore:
+            if stop_on_error and failed:
+                return WarpActionResult(
+                    success=False,
+                    action=action,
+                    error="Skipped after an earlier action failed"
+                )
+            try:
+                result = await call()
+            except Exception:
+                failed = True
+                raise
+            if not result.success:
+                failed = True
+            return result
+    
+    outcomes = await asyncio.gather(
+        *(guarded(action, call) for action, call in calls),
+        return_exceptions=True
+    )
+    
+    return [
+        outcome if isinstance(outcome, WarpActionResult) else WarpActionResult(
+            success=False,
+            action=action,
+            error=str(outcome)
+        )
+        for (action, _), outcome in zip(calls, outcomes)
+    ]
+
+
+async def batch_execute_actions(
+    actions: List[Dict[str, Any]],
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT_ACTIONS,
+    stop_on_error: bool = False,
+    working_directory: Optional[str] = None
+) -> List[WarpActionResult]:
+    """
+    Execute several independent actions concurrently.
+    
+    Each action is a dict with an "action" key (execute_command, create_file
+    or open_file) and the keyword arguments of the matching function. Actions
+    run in parallel, so pass max_concurrent=1 when they depend on each other.
+    
+    Args:
+        actions: The actions to execute
+        max_concurrent: Maximum number of actions running at once
+        stop_on_error: Skip actions that have not started yet once one fails
+        working_directory: Default working directory for commands
+        
+    Returns:
+        List of WarpActionResult objects, one per action, in input order
+    """
+    calls = []
+    
+    for spec in actions:
+        params = dict(spec)
+        action = str(params.pop("action", None))
+        handler = _ACTION_HANDLERS.get(action)
+        
+        if handler is None:
+            calls.append((action, functools.partial(_unknown_action, action)))
+            continue
+        
+        if handler is execute_terminal_command:
+            params.setdefault("working_directory", working_directory)
+        calls.append((action, functools.partial(handler, **params)))
+    
+    return await _run_bounded(calls, max_concurrent, stop_on_error)
+
+
 async def parse_and_execute_actions(
     poe_response: str,
     working_directory: Optional[str] = None
@@ -224,25 +385,23 @@ async def parse_and_execute_actions(
     results = []
     
     try:
-        # Look for code blocks with file creation intent
-        import re
-        
-        # Pattern for file creation: ```filename\ncode```
-        file_pattern = r'```(\w+(?:\.\w+)?)\s*\n(.*?)\n```'
-        file_matches = re.findall(file_pattern, poe_response, re.DOTALL)
+        # Look for code blocks with file creation intent. A block should be
+        # saved if a save keyword appears anywhere before it, so find where
+        # the first keyword ends once and compare block offsets against it
+        intent = _SAVE_INTENT_RE.search(poe_response)
+        intent_end = intent.end() if intent else None
         
-        for filename, content in file_matches:
-            # Check if the response indicates this should be saved
-            context_before = poe_response[:poe_response.find(f'```{filename}')]
-            if any(keyword in context_before.lower() for keyword in [
-                'save', 'create', 'write', 'file', 'here\'s the', 'here is the'
-            ]):
-                result = await create_file_from_response(filename, content.strip())
-                results.append(result)
+        # Files are independent of each other, so write them concurrently
+        file_calls = [
+            ("create_file", functools.partial(create_file_from_response, match.group(1), match.group(2).strip()))
+            for match in _FILE_RE.finditer(poe_response)
+            if intent_end is not None and intent_end <= match.start()
+        ]
+        results.extend(await _run_bounded(file_calls))
         
-        # Pattern for command execution: "run:" or "execute:"
-        command_pattern = r'(?:run|execute):\s*`([^`]+)`'
-        command_matches = re.findall(command_pattern, poe_response, re.IGNORECASE)
+        # Look for command execution requests. Commands may depend on the
+        # files above and on each other, so they still run one at a time
+        command_matches = _CMD_RE.findall(poe_response)
         
         for command in command_matches:
             result = await execute_terminal_command(
@@ -251,13 +410,12 @@ async def parse_and_execute_actions(
             )
             results.append(result)
         
-        # Pattern for opening files: "open file:" or similar
-        open_pattern = r'open\s+(?:file\s+)?[`"\']([^`"\']+)[`"\']'
-        open_matches = re.findall(open_pattern, poe_response, re.IGNORECASE)
-        
-        for file_path in open_matches:
-            result = await open_file_in_editor(file_path)
-            results.append(result)
+        # Look for editor opening requests
+        open_calls = [
+            ("open_file", functools.partial(open_file_in_editor, file_path))
+            for file_path in _OPEN_RE.findall(poe_response)
+        ]
+        results.extend(await _run_bounded(open_calls))
             
     except Exception as e:
         logger.error(f"Error parsing actions from response: {str(e)}")
@@ -283,23 +441,24 @@ def format_action_results(results: List[WarpActionResult]) -> str:
     if not results:
         return "No actions were detected or executed."
     
-    output = []
-    success_count = sum(1 for r in results if r.success)
-    
-    output.append(f"Executed {len(results)} actions ({success_count} successful)")
-    output.append("=" * 50)
+    # Write the entries into one buffer, counting successes on the same pass;
+    # the header that needs the count is prepended at the end
+    buf = io.StringIO()
+    write = buf.write
+    success_count = 0
     
     for i, result in enumerate(results, 1):
+        success_count += result.success
         status = "✓" if result.success else "✗"
-        output.append(f"{i}. {status} {result.action}")
+        # Results after the first are separated by a blank line
+        write("\n" if i == 1 else "\n\n")
+        write(f"{i}. {status} {result.action}")
         
         if result.output:
-            output.append(f"   Output: {result.output}")
+            write(f"\n   Output: {result.output}")
         
         if result.error:
-            output.append(f"   Error: {result.error}")
-        
-        if i < len(results):
-            output.append("")
+            write(f"\n   Error: {result.error}")
     
-    return "\n".join(output)
\ No newline at end of file
+    header = f"Executed {len(results)} actions ({success_count} successful)\n" + "=" * 50
+    return header + buf.getvalue()
\ No newline at end of file
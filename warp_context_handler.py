@@ -8,17 +8,46 @@ This module handles:
 - Media display in Warp
 """
 import os
-import json
+import re
 import base64
+import shlex
+import shutil
 import subprocess
 import asyncio
-from typing import Dict, List, Optional, Any, Union
+import functools
+from typing import Dict, List, Optional, Any, Tuple, Union
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from types import MappingProxyType
+from dataclasses import dataclass, fields
 from enum import Enum
+import orjson
+from cachetools import TTLCache
 from loguru import logger
 
 
+# Read-only view of the server's environment, used when a request has none
+_PROCESS_ENV = MappingProxyType(os.environ)
+
+# Git queries behind the git context: branch, working tree status, remote
+_GIT_STATE_COMMANDS = (
+    ('git', 'rev-parse', '--abbrev-ref', 'HEAD'),
+    ('git', 'status', '--porcelain'),
+    ('git', 'remote', 'get-url', 'origin'),
+)
+
+# Git state is reused per working directory for this many seconds, short
+# enough that edits between requests still show up
+GIT_STATE_TTL = 2.0
+_git_state_cache = TTLCache(maxsize=128, ttl=GIT_STATE_TTL)
+
+# Bytes read per step when encoding a file as a data URL; a multiple of 3,
+# so the base64 of consecutive chunks concatenates without padding
+DATA_URL_CHUNK_SIZE = 3 * 256 * 1024
+
+# Markdown code fence lines in POE responses, e.g. ```python
+_FENCE_LINE_RE = re.compile(r"^```.*$", re.MULTILINE)
+
+
 class BlockType(Enum):
     """Warp block types for output formatting."""
     TEXT = "text"
@@ -33,6 +62,10 @@ class BlockType(Enum):
     ERROR = "error"
 
 
+# Serialized value of each block type, so to_dict skips the Enum descriptor
+_BLOCK_TYPE_VALUES = {block_type: block_type.value for block_type in BlockType}
+
+
 @dataclass
 class WarpBlock:
     """Represents a Warp output block."""
@@ -48,13 +81,20 @@ class WarpBlock:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
-        result = {"type": self.type.value}
-        for key, value in asdict(self).items():
-            if key != "type" and value is not None:
+        # Read the fields directly; asdict() would deep-copy every value first
+        result = {"type": _BLOCK_TYPE_VALUES[self.type]}
+        values = self.__dict__
+        for key in self._FIELDS:
+            value = values[key]
+            if value is not None:
                 result[key] = value
         return result
 
 
+# Optional WarpBlock fields copied by to_dict, worked out once at import time
+WarpBlock._FIELDS = tuple(field.name for field in fields(WarpBlock) if field.name != "type")
+
+
 class WarpContextExtractor:
     """Extract context from Warp terminal."""
     
@@ -63,6 +103,11 @@ class WarpContextExtractor:
         """
         Extract context from Warp MCP request.
         
+        When the request carries no env, context['env'] is a read-only live
+        view of os.environ rather than a copy; callers that need to modify
+        it must copy it first (e.g. dict(context['env'])), and results sent
+        back to a client should go through serializable_context().
+        
         Args:
             request_context: Context object from Warp MCP request
             
@@ -100,10 +145,12 @@ class WarpContextExtractor:
             context['git'] = request_context['git']
         else:
             # Try to get git state if not provided
-            context['git'] = WarpContextExtractor._get_git_state(context['cwd'])
+            context['git'] = WarpContextExtractor._get_cached_git_state(context['cwd'])
         
         # Extract environment
-        context['env'] = request_context.get('env', dict(os.environ))
+        # Fall back to a read-only live view of the process environment
+        # rather than copying it on every request
+        context['env'] = request_context.get('env', _PROCESS_ENV)
         
         # Extract file references (@mentions)
         if 'references' in request_context:
@@ -113,43 +160,72 @@ class WarpContextExtractor:
         if 'attachments' in request_context:
             context['attachments'] = request_context['attachments']
         
+        # Carry the caller's opt-out of cached prompt building
+        if request_context.get('no_cache'):
+            context['no_cache'] = True
+        
+        return context
+    
+    @staticmethod
+    def serializable_context(context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prepare an extracted context for inclusion in a tool result.
+        
+        The process environment view that extract_from_request() falls back
+        to can't be serialized, so it is copied into a plain dict here.
+        
+        Args:
+            context: Context returned by extract_from_request()
+            
+        Returns:
+            The context, with env as a plain dict
+        """
+        if isinstance(context.get('env'), MappingProxyType):
+            return {**context, 'env': dict(context['env'])}
         return context
     
+    @staticmethod
+    def _get_cached_git_state(cwd: str) -> Dict[str, Any]:
+        """Get git state, reusing a result from the last GIT_STATE_TTL seconds."""
+        git_info = _git_state_cache.get(cwd)
+        if git_info is None:
+            git_info = _git_state_cache[cwd] = WarpContextExtractor._get_git_state(cwd)
+        return dict(git_info)
+    
     @staticmethod
     def _get_git_state(cwd: str) -> Dict[str, Any]:
         """Get current git state."""
         git_info = {}
         try:
+            # Start the branch, status and remote queries together and then
+            # collect them, so the git processes run concurrently instead of
+            # one after another
+            branch, status, remote = [
+                subprocess.Popen(
+                    command,
+                    cwd=cwd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True
+                )
+                for command in _GIT_STATE_COMMANDS
+            ]
+            
             # Get branch
-            result = subprocess.run(
-                ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                cwd=cwd,
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                git_info['branch'] = result.stdout.strip()
+            stdout, _ = branch.communicate()
+            if branch.returncode == 0:
+                git_info['branch'] = stdout.strip()
             
             # Get status
-            result = subprocess.run(
-                ['git', 'status', '--porcelain'],
-                cwd=cwd,
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                git_info['status'] = result.stdout
-                git_info['dirty'] = bool(result.stdout.strip())
+            stdout, _ = status.communicate()
+            if status.returncode == 0:
+                git_info['status'] = stdout
+                git_info['dirty'] = bool(stdout.strip())
             
             # Get remote
-            result = subprocess.run(
-                ['git', 'remote', 'get-url', 'origin'],
-                cwd=cwd,
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                git_info['remote'] = result.stdout.strip()
+            stdout, _ = remote.communicate()
+            if remote.returncode == 0:
+                git_info['remote'] = stdout.strip()
                 
         except Exception as e:
             logger.debug(f"Could not get git state: {e}")
@@ -165,6 +241,45 @@ class WarpContextExtractor:
                 output_lines.append(block.get('text', ''))
         return '\n'.join(output_lines)
     
+    @staticmethod
+    def extract_all(
+        context: Dict[str, Any],
+        max_terminal_chars: Optional[int] = None
+    ) -> Tuple[str, Optional[str], List[str]]:
+        """
+        Extract terminal output, selected text and file references in one go.
+        
+        Equivalent to calling the three extractors separately, but walks the
+        blocks once and stops collecting terminal output as soon as
+        max_terminal_chars characters have been gathered.
+        
+        Args:
+            context: Extracted Warp context
+            max_terminal_chars: Optional limit on the terminal output length
+            
+        Returns:
+            Tuple of (terminal output, selected text, file references)
+        """
+        output_lines = []
+        output_length = 0
+        for block in context.get('blocks', []):
+            if block.get('type') == 'output':
+                text = block.get('text', '')
+                output_lines.append(text)
+                output_length += len(text) + 1
+                if max_terminal_chars is not None and output_length > max_terminal_chars:
+                    break
+        
+        terminal_output = '\n'.join(output_lines)
+        if max_terminal_chars is not None:
+            terminal_output = terminal_output[:max_terminal_chars]
+        
+        return (
+            terminal_output,
+            WarpContextExtractor.extract_selected_text(context),
+            WarpContextExtractor.extract_file_references(context),
+        )
+    
     @staticmethod
     def extract_selected_text(context: Dict[str, Any]) -> Optional[str]:
         """Extract selected text from context."""
@@ -195,6 +310,26 @@ class WarpContextExtractor:
         return files
 
 
+def _code_language(filename: str) -> str:
+    """
+    Language tag for a code block: the file extension, or 'text' if none.
+    
+    Matches Path(filename).suffix.lstrip('.') or 'text' using plain string
+    operations, without building a Path.
+    """
+    # Last path component, skipping empty and '.' parts as Path does
+    name = ''
+    for part in reversed(filename.split('/')):
+        if part and part != '.':
+            name = part
+            break
+    
+    dot = name.rfind('.')
+    if 0 < dot < len(name) - 1:
+        return name[dot + 1:]
+    return 'text'
+
+
 class WarpOutputFormatter:
     """Format output for Warp terminal display."""
     
@@ -285,18 +420,76 @@ class WarpOutputFormatter:
             meta={"severity": "error"}
         )
     
+    # Dict forms of the common blocks, equal to create_*_block(...).to_dict()
+    # but built directly, so the formatter's own hot paths skip the dataclass
+    @staticmethod
+    def _text_dict(text: str) -> Dict[str, Any]:
+        """Text block as a dictionary."""
+        return {"type": "text", "text": text}
+    
+    @staticmethod
+    def _code_dict(code: str, language: str = "python") -> Dict[str, Any]:
+        """Code block as a dictionary."""
+        return {
+            "type": "code",
+            "text": code,
+            "meta": {"language": language, "line_numbers": False}
+        }
+    
+    @staticmethod
+    def _command_dict(command: str) -> Dict[str, Any]:
+        """Executable command block as a dictionary."""
+        return {
+            "type": "command",
+            "text": command,
+            "actions": [{"type": "run", "command": command}]
+        }
+    
+    @staticmethod
+    def _error_dict(error: str) -> Dict[str, Any]:
+        """Error block without details as a dictionary."""
+        return {
+            "type": "error",
+            "text": f"❌ Error: {error}",
+            "meta": {"severity": "error"}
+        }
+    
     @staticmethod
     def _file_to_data_url(filepath: str, media_type: str) -> str:
         """Convert file to data URL for inline display."""
         try:
+            # Encode the file a chunk at a time into one buffer, so the raw
+            # file and a full-size intermediate encoding are never held at once
+            url = bytearray(f"data:{media_type};base64,".encode('utf-8'))
             with open(filepath, 'rb') as f:
-                data = f.read()
-                b64 = base64.b64encode(data).decode('utf-8')
-                return f"data:{media_type};base64,{b64}"
+                for chunk in iter(functools.partial(f.read, DATA_URL_CHUNK_SIZE), b''):
+                    url += base64.b64encode(chunk)
+            return url.decode('utf-8')
         except Exception as e:
             logger.error(f"Failed to convert file to data URL: {e}")
             return ""
     
+    @staticmethod
+    def serialize(blocks: List[Union[WarpBlock, Dict[str, Any]]]) -> bytes:
+        """
+        Serialize Warp blocks to JSON bytes.
+        
+        WarpBlock instances are converted through to_dict, so None fields are
+        left out exactly as in the dict form; already-converted dicts are
+        encoded as they are.
+        
+        Args:
+            blocks: WarpBlock instances and/or block dictionaries
+            
+        Returns:
+            UTF-8 encoded JSON array
+        """
+        return orjson.dumps(
+            blocks,
+            default=WarpBlock.to_dict,
+            option=orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        )
+    
     @staticmethod
     def format_response(
         text: Optional[str] = None,
@@ -326,22 +519,18 @@ class WarpOutputFormatter:
         
         # Add text blocks
         if text:
-            blocks.append(WarpOutputFormatter.create_text_block(text).to_dict())
+            blocks.append(WarpOutputFormatter._text_dict(text))
         
         # Add code blocks
         if code:
             for filename, content in code.items():
-                lang = Path(filename).suffix.lstrip('.') or 'text'
-                blocks.append(
-                    WarpOutputFormatter.create_code_block(content, lang).to_dict()
-                )
+                lang = _code_language(filename)
+                blocks.append(WarpOutputFormatter._code_dict(content, lang))
         
         # Add command blocks
         if commands:
             for cmd in commands:
-                blocks.append(
-                    WarpOutputFormatter.create_command_block(cmd).to_dict()
-                )
+                blocks.append(WarpOutputFormatter._command_dict(cmd))
         
         # Add file blocks
         if files:
@@ -373,13 +562,68 @@ class WarpOutputFormatter:
         # Add error blocks
         if errors:
             for error in errors:
-                blocks.append(
-                    WarpOutputFormatter.create_error_block(error).to_dict()
-                )
+                blocks.append(WarpOutputFormatter._error_dict(error))
         
         return blocks
 
 
+# Line prefixes that mark executable actions in a POE response
+ACTION_MARKERS = ('[EXECUTE]:', '[CREATE_FILE]:')
+
+# A marker line: optional indentation, the marker, then its argument
+_ACTION_LINE_RE = re.compile(r"^[^\S\n]*(\[EXECUTE\]:|\[CREATE_FILE\]:)(.*)$", re.MULTILINE)
+
+# Actions from one response run one at a time by default, since commands
+# usually build on files and commands that came before them
+DEFAULT_ACTION_CONCURRENCY = 1
+
+
+# Characters that need a shell to interpret: operators, redirection,
+# expansion, globbing, grouping, comments, escapes and variable assignment
+_SHELL_SYNTAX_RE = re.compile(r"[;&|<>$`*?~(){}\[\]#!=\\\n]")
+
+
+def _direct_argv(command: str) -> Optional[List[str]]:
+    """
+    Split a command into an argv that can be executed without a shell.
+    
+    Args:
+        command: Command line from a POE response
+        
+    Returns:
+        The argv, or None if the command needs a shell to run as written
+    """
+    # shlex follows POSIX sh quoting, which doesn't match cmd.exe on Windows
+    if os.name != 'posix' or _SHELL_SYNTAX_RE.search(command):
+        return None
+    
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    
+    # Builtins and unknown programs are left to the shell, which also
+    # reports "command not found" the way callers expect
+    if not argv or shutil.which(argv[0]) is None:
+        return None
+    
+    return argv
+
+
+def _available_cpus() -> int:
+    """Number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # sched_getaffinity is Linux-only
+        return os.cpu_count() or 1
+
+
+# Upper bound on action subprocesses running at once, across all requests
+MAX_CONCURRENT_COMMANDS = min(8, _available_cpus())
+_command_semaphore = asyncio.Semaphore(MAX_CONCURRENT_COMMANDS)
+
+
 class WarpActionExecutor:
     """Execute actions from POE responses in Warp terminal."""
     
@@ -389,19 +633,45 @@ class WarpActionExecutor:
         cwd: Optional[str] = None,
         timeout: int = 30
     ) -> Dict[str, Any]:
-        """Execute a shell command."""
+        """
+        Execute a shell command.
+        
+        Simple commands (no shell syntax, and a program found on PATH) are
+        run directly from their shlex-split argv, skipping the /bin/sh
+        process; anything else, including builtins such as cd, still goes
+        through the shell.
+        """
         try:
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd
-            )
+            argv = _direct_argv(command)
             
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
-            )
+            # Hold a slot for the whole life of the process, so batched
+            # actions can't fork more subprocesses than the CPUs can run
+            async with _command_semaphore:
+                if argv:
+                    process = await asyncio.create_subprocess_exec(
+                        *argv,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        cwd=cwd
+                    )
+                else:
+                    process = await asyncio.create_subprocess_shell(
+                        command,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        cwd=cwd
+                    )
+                
+                try:
+                    stdout, stderr = await asyncio.wait_for(
+                        process.communicate(),
+                        timeout=timeout
+                    )
+                except asyncio.TimeoutError:
+                    # Don't leave the process running once its slot is freed
+                    process.kill()
+                    await process.wait()
+                    raise
             
             return {
                 'success': process.returncode == 0,
@@ -425,12 +695,12 @@ class WarpActionExecutor:
             }
     
     @staticmethod
-    async def create_file(
+    def _create_file_sync(
         filepath: str,
         content: str,
         mode: str = 'w'
     ) -> Dict[str, Any]:
-        """Create or modify a file."""
+        """Create or modify a file (blocking)."""
         try:
             path = Path(filepath)
             path.parent.mkdir(parents=True, exist_ok=True)
@@ -451,10 +721,44 @@ class WarpActionExecutor:
                 'filepath': filepath
             }
     
+    @staticmethod
+    async def create_file(
+        filepath: str,
+        content: str,
+        mode: str = 'w'
+    ) -> Dict[str, Any]:
+        """Create or modify a file."""
+        # Disk I/O runs on the default executor so a large write doesn't
+        # stall the event loop
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(WarpActionExecutor._create_file_sync, filepath, content, mode)
+        )
+    
+    @staticmethod
+    async def create_files(files: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Create several files in order, in a single executor job.
+        
+        Args:
+            files: (filepath, content) pairs
+            
+        Returns:
+            One create_file result per file
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: [
+                WarpActionExecutor._create_file_sync(filepath, content)
+                for filepath, content in files
+            ]
+        )
+    
     @staticmethod
     async def parse_and_execute_actions(
         poe_response: str,
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        max_concurrent: int = DEFAULT_ACTION_CONCURRENCY
     ) -> List[Dict[str, Any]]:
         """
         Parse POE response for actions and execute them.
@@ -463,39 +767,78 @@ class WarpActionExecutor:
         - [EXECUTE]: command
         - [CREATE_FILE]: filepath
         - [EDIT_FILE]: filepath
+        
+        All actions are parsed first and then run through asyncio.gather,
+        at most max_concurrent at a time. With the default of 1 they run
+        strictly in response order; raise it only when the actions are
+        known to be independent. Results are returned in response order.
         """
-        results = []
-        lines = poe_response.split('\n')
+        # Most responses carry no actions; a substring scan is enough to
+        # skip splitting and walking every line
+        if not any(marker in poe_response for marker in ACTION_MARKERS):
+            return []
         
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
+        # Parse every action before running any of them. Consecutive files
+        # are grouped into one batch, written with a single executor job
+        actions = []
+        file_batch = None
+        
+        # Jump from marker line to marker line in the original string; file
+        # contents are sliced out directly instead of split and re-joined
+        pos = 0
+        while True:
+            match = _ACTION_LINE_RE.search(poe_response, pos)
+            if match is None:
+                break
+            marker, argument = match.groups()
+            line_end = match.end()
+            pos = line_end
             
             # Detect command execution
-            if line.startswith('[EXECUTE]:'):
-                command = line[10:].strip()
-                result = await WarpActionExecutor.execute_command(
+            if marker == '[EXECUTE]:':
+                command = argument.strip()
+                actions.append(functools.partial(
+                    WarpActionExecutor.execute_command,
                     command,
                     cwd=context.get('cwd')
-                )
-                results.append(result)
+                ))
+                file_batch = None
             
             # Detect file creation
-            elif line.startswith('[CREATE_FILE]:'):
-                filepath = line[14:].strip()
-                # Collect content until next marker or end
-                content_lines = []
-                i += 1
-                while i < len(lines) and not lines[i].startswith('['):
-                    content_lines.append(lines[i])
-                    i += 1
-                i -= 1  # Back up one line
+            else:
+                filepath = argument.strip()
+                # Content runs until the next line starting with '[' or the end
+                content_end = poe_response.find('\n[', line_end)
+                if content_end == -1:
+                    content = poe_response[line_end + 1:]
+                    pos = len(poe_response)
+                else:
+                    content = poe_response[line_end + 1:content_end]
+                    pos = content_end
                 
-                content = '\n'.join(content_lines)
-                result = await WarpActionExecutor.create_file(filepath, content)
+                if file_batch is None:
+                    file_batch = []
+                    actions.append(functools.partial(
+                        WarpActionExecutor.create_files,
+                        file_batch
+                    ))
+                file_batch.append((filepath, content))
+        
+        # The semaphore hands out slots in request order, so a limit of 1
+        # keeps the original sequential behaviour
+        semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        
+        async def run(action):
+            async with semaphore:
+                return await action()
+        
+        results = []
+        for result in await asyncio.gather(*(run(action) for action in actions)):
+            # File batches return one result per file
+            if isinstance(result, list):
+                results.extend(result)
+            else:
                 results.append(result)
-            
-            i += 1
         
         return results
 
@@ -567,52 +910,41 @@ class WarpMCPIntegration:
         Returns:
             List of formatted Warp blocks
         """
+        formatter = self.output_formatter
+        
+        # Most responses are plain text; skip the fence scan entirely
+        if '```' not in poe_response:
+            return [formatter._text_dict(poe_response)]
+        
         blocks = []
         
         # Parse response for different content types
-        # This is a simplified parser - enhance based on actual POE output
-        lines = poe_response.split('\n')
-        current_code = []
-        current_text = []
+        # This is a simplified parser - enhance based on actual POE output.
+        # Every line starting with ``` toggles between text and code; the
+        # lines between two fences become one block. The fence lines are
+        # found with a single regex pass instead of splitting the response
+        segment_start = 0
         in_code_block = False
         
-        for line in lines:
-            if line.startswith('```'):
+        for fence in _FENCE_LINE_RE.finditer(poe_response):
+            # A segment exists only if at least one line precedes this fence
+            if segment_start < fence.start():
+                segment = poe_response[segment_start:fence.start() - 1]
                 if in_code_block:
-                    # End code block
-                    if current_code:
-                        code = '\n'.join(current_code)
-                        blocks.append(
-                            self.output_formatter.create_code_block(code).to_dict()
-                        )
-                        current_code = []
-                    in_code_block = False
+                    blocks.append(formatter._code_dict(segment))
                 else:
-                    # Start code block
-                    if current_text:
-                        text = '\n'.join(current_text)
-                        blocks.append(
-                            self.output_formatter.create_text_block(text).to_dict()
-                        )
-                        current_text = []
-                    in_code_block = True
-            elif in_code_block:
-                current_code.append(line)
+                    blocks.append(formatter._text_dict(segment))
+            
+            in_code_block = not in_code_block
+            segment_start = fence.end() + 1
+        
+        # Add remaining content, including an unterminated code block
+        if segment_start <= len(poe_response):
+            segment = poe_response[segment_start:]
+            if in_code_block:
+                blocks.append(formatter._code_dict(segment))
             else:
-                current_text.append(line)
-        
-        # Add remaining content
-        if current_text:
-            text = '\n'.join(current_text)
-            blocks.append(
-                self.output_formatter.create_text_block(text).to_dict()
-            )
-        
-        if current_code:
-            code = '\n'.join(current_code)
-            blocks.append(
-                self.output_formatter.create_code_block(code).to_dict()
-            )
+                blocks.append(formatter._text_dict(segment))
         
         return blocks
 